@@ -0,0 +1,129 @@
+"""Summarize span traces written by the bot.
+
+Reads traces/traces.jsonl (and its rotated backups) and reports, per span
+type, how many there were, p50/p95/max duration and what share of total
+update time they account for. Span types are split by their main
+attribute: tools by tool name, fetches by platform, Claude calls by route.
+
+    python analyze_traces.py
+    python analyze_traces.py traces/traces.jsonl --slowest 5
+"""
+
+import argparse
+import glob
+import json
+from collections import defaultdict
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_PATH = SCRIPT_DIR / "traces" / "traces.jsonl"
+
+# Attribute that splits each span name into separate rows
+GROUP_ATTRS = {
+    "update": "kind",
+    "claude": "route",
+    "tool": "tool",
+    "fetch": "platform",
+    "fetch.wait": "platform",
+    "sqlite": "op",
+    "telegram.send": "kind",
+}
+
+
+def load_spans(path: Path) -> list[dict]:
+    """Read spans from a trace file and its rotated backups (file.1, file.2, ...)."""
+    spans = []
+    for name in sorted(glob.glob(f"{path}*")):
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # partially written line at rotation
+    return spans
+
+
+def span_type(record: dict) -> str:
+    attr = GROUP_ATTRS.get(record["name"])
+    value = (record.get("attrs") or {}).get(attr) if attr else None
+    return f"{record['name']}[{value}]" if value is not None else record["name"]
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(spans: list[dict]):
+    """Print a per-span-type latency breakdown."""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for record in spans:
+        if record.get("duration_ms") is None:
+            continue
+        kind = span_type(record)
+        durations[kind].append(record["duration_ms"])
+        if record.get("error"):
+            errors[kind] += 1
+
+    update_total = sum(r["duration_ms"] for r in spans if r["name"] == "update" and not r.get("parent"))
+    print(f"{len(spans)} spans, {sum(1 for r in spans if not r.get('parent'))} traces\n")
+    print(f"{'span':<32} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'% updates':>10} {'errors':>7}")
+    rows = sorted(durations.items(), key=lambda item: -sum(item[1]))
+    for kind, values in rows:
+        ordered = sorted(values)
+        share = f"{sum(values) / update_total:.0%}" if update_total else "-"
+        print(
+            f"{kind:<32} {len(values):>7} {percentile(ordered, 0.5):>9.1f} "
+            f"{percentile(ordered, 0.95):>9.1f} {ordered[-1]:>9.1f} {share:>10} {errors[kind]:>7}"
+        )
+    if update_total:
+        print("\n% updates = summed span time / summed update time; nested and concurrent spans overlap.")
+
+
+def show_slowest(spans: list[dict], count: int):
+    """Print the slowest traces as indented span trees."""
+    by_trace = defaultdict(list)
+    for record in spans:
+        by_trace[record["trace"]].append(record)
+
+    roots = sorted(
+        (r for r in spans if not r.get("parent") and r.get("duration_ms") is not None),
+        key=lambda r: -r["duration_ms"],
+    )[:count]
+
+    for root in roots:
+        children = defaultdict(list)
+        for record in by_trace[root["trace"]]:
+            children[record.get("parent")].append(record)
+
+        def walk(record: dict, depth: int):
+            offset = (record["start"] - root["start"]) * 1000
+            attrs = record.get("attrs") or {}
+            details = " ".join(f"{k}={v}" for k, v in attrs.items())
+            error = f"  ERROR {record['error']}" if record.get("error") else ""
+            print(f"{'  ' * depth}{record['name']:<20} +{offset:>8.0f}ms {record['duration_ms']:>9.1f}ms  {details}{error}")
+            for child in sorted(children[record["span"]], key=lambda r: r["start"]):
+                walk(child, depth + 1)
+
+        print()
+        walk(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize bot span traces")
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_PATH, help="Trace JSONL file")
+    parser.add_argument("--slowest", type=int, default=0, help="Also show the N slowest traces")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path)
+    if not spans:
+        print(f"No spans found in {args.path}")
+        return
+
+    report(spans)
+    if args.slowest:
+        show_slowest(spans, args.slowest)
+
+
+if __name__ == "__main__":
+    main()
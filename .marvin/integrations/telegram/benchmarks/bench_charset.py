@@ -0,0 +1,83 @@
+"""Benchmark HTML body decoding: content-based guessing vs. header/BOM/meta sniffing.
+
+`resp.text` falls back to charset detection over the whole body when the
+Content-Type header has no charset. This compares that path with
+`detect_encoding` on large local fixture pages.
+
+Usage:
+    python benchmarks/bench_charset.py [--sizes 256K,2M,8M] [--repeat 3]
+"""
+
+import argparse
+import codecs
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+from fixtures import synthetic_html
+from html_extract import detect_encoding
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    multiplier = {"K": 1024, "M": 1024 * 1024}.get(value[-1], 1)
+    return int(value.rstrip("KM")) * multiplier
+
+
+def guessed_text(body: bytes) -> str:
+    """Decode like resp.text does for a response without a declared charset."""
+    resp = requests.Response()
+    resp._content = body
+    resp.encoding = None
+    return resp.text
+
+
+def sniffed_text(body: bytes, content_type: str) -> str:
+    encoding = detect_encoding(content_type, body[:4096])
+    return codecs.decode(body, encoding, errors="replace")
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML charset handling")
+    parser.add_argument("--sizes", default="256K,2M,8M", help="Comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best is reported)")
+    args = parser.parse_args()
+
+    cases = [
+        ("utf-8, meta charset", "utf-8", "utf-8"),
+        ("utf-8, no declaration", None, "utf-8"),
+        ("windows-1252, meta charset", "windows-1252", "windows-1252"),
+    ]
+
+    print(f"{'case':<30} {'size':>8} {'guessing':>10} {'sniffing':>10} {'speedup':>8} {'same text':>10}")
+    for size_label in args.sizes.split(","):
+        size = parse_size(size_label)
+        for label, meta, encoding in cases:
+            body = synthetic_html(size, meta_charset=meta).encode(encoding)
+            content_type = "text/html"  # no charset in the header
+
+            guessed = best_time(lambda: guessed_text(body), args.repeat)
+            sniffed = best_time(lambda: sniffed_text(body, content_type), args.repeat)
+            same = guessed_text(body) == sniffed_text(body, content_type)
+
+            print(
+                f"{label:<30} {size_label:>8} {guessed * 1000:>8.1f}ms {sniffed * 1000:>8.1f}ms "
+                f"{guessed / sniffed:>7.0f}x {'yes' if same else 'no':>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Micro-benchmarks for ContentFetcher, per platform.
+
+Serves synthetic pages, Reddit threads and YouTube oEmbed data from a
+local fixture server in a child process, which builds each body once, so
+the numbers reflect ContentFetcher rather than fixture generation. Requests
+for www.reddit.com and www.youtube.com are routed there by a session
+adapter. Transcripts come from a stub transcript client, since YouTube's
+transcript protocol can't be replayed locally. Pages saved in
+benchmarks/recorded/*.html are benchmarked as well.
+
+Each case reports the median and best fetch time, the peak traced memory
+and the number of memory blocks still allocated after one fetch. The fetch
+cache is cleared before every run.
+
+Usage:
+    python benchmarks/bench_fetchers.py [--repeat 5] [--only reddit]
+    python benchmarks/bench_fetchers.py --save baseline.json
+    python benchmarks/bench_fetchers.py --compare baseline.json [--threshold 0.25]
+
+With --compare, the exit status is 1 if any case got slower or used more
+peak memory than the threshold allows.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from requests.adapters import HTTPAdapter
+
+from content_fetcher import ContentFetcher, HostRateLimiter, TranscriptSegments
+from fixtures import RECORDED_DIR, serve_fixtures
+
+
+class FixtureAdapter(HTTPAdapter):
+    """Sends requests for a real host to the fixture server under a path prefix."""
+
+    def __init__(self, base_url: str, prefix: str):
+        super().__init__()
+        self.base_url = base_url
+        self.prefix = prefix
+
+    def send(self, request, **kwargs):
+        parsed = urlparse(request.url)
+        request.url = f"{self.base_url}{self.prefix}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+        return super().send(request, **kwargs)
+
+
+class StubTranscriptApi:
+    """Returns a fixed transcript of `count` snippets for any video."""
+
+    def __init__(self, count: int):
+        self.snippets = [
+            SimpleNamespace(start=i * 2.5, duration=2.5, text=f"segment {i} of the talk where the speaker\nexplains things")
+            for i in range(count)
+        ]
+
+    def fetch(self, video_id: str):
+        return self.snippets
+
+
+def build_fetcher(base_url: str, web_mode: str = "main") -> ContentFetcher:
+    fetcher = ContentFetcher(web_mode=web_mode)
+    fetcher.session.mount("https://www.reddit.com/", FixtureAdapter(base_url, "/reddit"))
+    fetcher.session.mount("https://www.youtube.com/", FixtureAdapter(base_url, "/youtube"))
+    # Measure the fetchers, not the politeness delays
+    fetcher.limiter = HostRateLimiter(limits={}, default=(1e6, 10 ** 6))
+    return fetcher
+
+
+def fetch_case(fetcher: ContentFetcher, url: str, transcript_snippets: int = 0):
+    def run():
+        fetcher._cache.clear()
+        if transcript_snippets:
+            fetcher._youtube_local.api = StubTranscriptApi(transcript_snippets)
+        result = fetcher.fetch(url)
+        if result.error:
+            raise RuntimeError(f"{url}: {result.error}")
+        return result
+    return run
+
+
+def build_cases(base_url: str) -> dict:
+    main = build_fetcher(base_url, "main")
+    text = build_fetcher(base_url, "text")
+    long_transcript = TranscriptSegments.from_snippets(StubTranscriptApi(20000).snippets)
+
+    cases = {
+        "web/main/small": fetch_case(main, f"{base_url}/article/1?size=5000"),
+        "web/main/large": fetch_case(main, f"{base_url}/article/2?size=500000"),
+        "web/main/huge": fetch_case(main, f"{base_url}/article/3?size=4000000"),
+        "web/text/large": fetch_case(text, f"{base_url}/article/2?size=500000"),
+        "web/text/huge": fetch_case(text, f"{base_url}/article/3?size=4000000"),
+        "reddit/shallow-wide": fetch_case(main, "https://www.reddit.com/comments/d2b40"),
+        "reddit/deep": fetch_case(main, "https://www.reddit.com/comments/d12b2"),
+        "reddit/bushy": fetch_case(main, "https://www.reddit.com/comments/d5b6"),
+        "youtube/1k-segments": fetch_case(main, "https://www.youtube.com/watch?v=AAAAAAAAAAA", 1000),
+        "youtube/20k-segments": fetch_case(main, "https://www.youtube.com/watch?v=BBBBBBBBBBB", 20000),
+        "youtube/format-20k": long_transcript.format,
+        "youtube/window-20k": lambda: long_transcript.format_window(3600, 7200, 8000),
+    }
+    for path in sorted(RECORDED_DIR.glob("*.html")) if RECORDED_DIR.is_dir() else []:
+        cases[f"recorded/{path.stem}"] = fetch_case(main, f"{base_url}/recorded/{path.name}")
+    return cases
+
+
+def measure(func, repeat: int) -> dict:
+    """Time `repeat` runs after a warm-up, then trace memory over one more run."""
+    func()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "best_ms": round(min(times) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "blocks": blocks,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Cases whose median time or peak memory grew by more than threshold."""
+    regressions = []
+    print(f"\nCompared with {baseline.get('revision', '?')} (threshold {threshold:.0%}):")
+    for name, current in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if not old:
+            print(f"  {name:<24} new case")
+            continue
+        changes = []
+        for metric in ("median_ms", "peak_kb"):
+            if old[metric] > 0:
+                change = current[metric] / old[metric] - 1
+                changes.append(f"{metric} {change:+.0%}")
+                if change > threshold:
+                    regressions.append(f"{name} {metric} {old[metric]} -> {current[metric]}")
+        print(f"  {name:<24} {', '.join(changes)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ContentFetcher per platform")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--only", help="Only run cases whose name contains this")
+    parser.add_argument("--save", type=Path, help="Write results as JSON (e.g. a baseline)")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    server, base_url = serve_fixtures()
+    cases = build_cases(base_url)
+    if args.only:
+        cases = {name: func for name, func in cases.items() if args.only in name}
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "cases": {},
+    }
+    print(f"{'case':<24} {'median':>10} {'best':>10} {'peak mem':>10} {'blocks':>8}")
+    for name, func in cases.items():
+        stats = measure(func, args.repeat)
+        results["cases"][name] = stats
+        print(
+            f"{name:<24} {stats['median_ms']:>8.2f}ms {stats['best_ms']:>8.2f}ms "
+            f"{stats['peak_kb']:>8.0f}KB {stats['blocks']:>8}"
+        )
+    server.shutdown()
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+        print(f"\nSaved to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
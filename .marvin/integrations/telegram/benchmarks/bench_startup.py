@@ -0,0 +1,126 @@
+"""Startup benchmark: import time and time until the bot is polling.
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported or cached. Cases:
+
+    import content_fetcher   what a one-off CLI fetch pays before fetching
+    import telegram_bot      what tools importing the bot module pay
+    bot polling              import, MARVINBot() and run() up to run_polling
+                             (patched out, so no network is needed)
+    bot ready                ...plus the background warm-up of the Claude
+                             client, fetcher and stores
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--json results.json]
+    python benchmarks/bench_startup.py --importtime 15
+
+--importtime runs `python -X importtime -c "import telegram_bot"` and lists
+the modules with the largest cumulative import time.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_CASE = """
+import json, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"ready": time.perf_counter() - started}}))
+"""
+
+BOT_CASE = """
+import json, threading, time
+from pathlib import Path
+started = time.perf_counter()
+import telegram_bot
+from telegram.ext import Application
+
+tmp = Path({tmp!r})
+telegram_bot.DB_PATH = tmp / "telegram.db"
+telegram_bot.SPILL_DIR = tmp / "payloads"
+Application.run_polling = lambda self, **kwargs: None
+
+telegram_bot.MARVINBot("123456:benchmark", [], trace_path=None).run()
+polling = time.perf_counter() - started
+for thread in threading.enumerate():
+    if thread.name == "warm-up":
+        thread.join()
+print(json.dumps({{"polling": polling, "ready": time.perf_counter() - started}}))
+"""
+
+
+def run_case(code: str, env: dict) -> dict:
+    """Run code in a fresh interpreter and return the timings it prints."""
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PACKAGE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def import_profile(env: dict, top: int) -> list[tuple[str, int]]:
+    """Top-level-ish modules by cumulative import time (microseconds)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import telegram_bot"],
+        cwd=PACKAGE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        # Nesting depth shows as indentation; keep packages imported near the top
+        if len(name) - len(name.lstrip()) <= 4:
+            rows.append((name.strip(), int(cumulative)))
+    return sorted(rows, key=lambda row: -row[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import and startup time")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per case")
+    parser.add_argument("--importtime", type=int, metavar="N", help="Also list the N slowest imports")
+    parser.add_argument("--json", type=Path, help="Write results to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("ANTHROPIC_API_KEY", "startup-benchmark")
+
+    with tempfile.TemporaryDirectory(prefix="marvin-startup-") as tmp:
+        cases = {
+            "import content_fetcher": (IMPORT_CASE.format(module="content_fetcher"), "ready"),
+            "import telegram_bot": (IMPORT_CASE.format(module="telegram_bot"), "ready"),
+            "bot polling": (BOT_CASE.format(tmp=tmp), "polling"),
+            "bot ready": (BOT_CASE.format(tmp=tmp), "ready"),
+        }
+        # One untimed run so .pyc files and the OS page cache are warm
+        run_case(cases["bot ready"][0], env)
+
+        results = {}
+        print(f"{'case':<24} {'median':>10} {'best':>10}")
+        for name, (code, phase) in cases.items():
+            times = [run_case(code, env)[phase] for _ in range(args.repeat)]
+            results[name] = {
+                "median_ms": round(statistics.median(times) * 1000, 1),
+                "best_ms": round(min(times) * 1000, 1),
+            }
+            print(f"{name:<24} {results[name]['median_ms']:>8.1f}ms {results[name]['best_ms']:>8.1f}ms")
+
+        if args.importtime:
+            print("\nSlowest imports under telegram_bot (cumulative):")
+            for module, micros in import_profile(env, args.importtime):
+                print(f"  {module:<40} {micros / 1000:>8.1f}ms")
+
+    if args.json:
+        args.json.write_text(json.dumps({"python": sys.version.split()[0], "cases": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
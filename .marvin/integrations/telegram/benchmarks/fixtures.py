@@ -0,0 +1,187 @@
+"""Synthetic fixture pages and a local HTTP server for the benchmarks."""
+
+import functools
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ARTICLE_PARAGRAPH = (
+    "<p>Le café au coin de la rue, déjà célèbre, sert des crêpes et des "
+    "pâtisseries, naïvement décorées — l'été comme l'hiver, façon rétro.</p>\n"
+)
+
+NAV_BLOCK = (
+    '<nav><ul>' + "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(40)) + '</ul></nav>\n'
+)
+
+SCRIPT_BLOCK = "<script>window.__DATA__ = " + '{"k": "' + "x" * 2000 + '"};</script>\n'
+
+
+def synthetic_html(size: int, meta_charset: str = None) -> str:
+    """An article page of roughly `size` characters with nav and script noise."""
+    head = "<!DOCTYPE html><html><head>"
+    if meta_charset:
+        head += f'<meta charset="{meta_charset}">'
+    head += "<title>Synthetic article</title></head><body>" + NAV_BLOCK + "<article><h1>Synthetic article</h1>\n"
+
+    parts = [head]
+    length = len(head)
+    i = 0
+    while length < size:
+        block = SCRIPT_BLOCK if i % 20 == 19 else ARTICLE_PARAGRAPH
+        parts.append(block)
+        length += len(block)
+        i += 1
+    parts.append("</article></body></html>")
+    return "".join(parts)
+
+
+def synthetic_reddit_thread(depth: int, breadth: int) -> list:
+    """A Reddit comments listing with `breadth` replies per comment, `depth` levels deep.
+
+    Comments carry the bulky fields real listings have (HTML bodies,
+    awards, flair) so that field trimming is exercised too.
+    """
+    counter = 0
+
+    def comment(level: int) -> dict:
+        nonlocal counter
+        counter += 1
+        body = f"Comment {counter} at depth {level}. " + "Some thoughtful discussion here. " * 8
+        replies = ""
+        if level + 1 < depth:
+            replies = {"kind": "Listing", "data": {"children": [comment(level + 1) for _ in range(breadth)]}}
+        return {
+            "kind": "t1",
+            "data": {
+                "id": f"c{counter}", "author": f"user{counter % 97}", "score": counter % 50,
+                "body": body, "body_html": f"<div class=\"md\"><p>{body}</p></div>",
+                "all_awardings": [{"name": "Helpful", "icon_url": "https://example.com/i.png"}] * 3,
+                "author_flair_richtext": [], "gildings": {}, "permalink": f"/r/test/comments/x/c{counter}/",
+                "parent_id": "t3_post", "replies": replies,
+            },
+        }
+
+    post = {
+        "kind": "Listing",
+        "data": {"children": [{"kind": "t3", "data": {
+            "id": "post", "title": f"Synthetic thread {depth}x{breadth}", "author": "op",
+            "selftext": "What do you all think? " * 20, "url": "https://www.reddit.com/r/test/",
+            "subreddit": "test", "score": 1234, "num_comments": 0, "created_utc": 1700000000,
+            "selftext_html": "<div>" + "What do you all think? " * 20 + "</div>",
+        }}]},
+    }
+    comments = {"kind": "Listing", "data": {"children": [comment(0) for _ in range(breadth)]}}
+    post["data"]["children"][0]["data"]["num_comments"] = counter
+    return [post, comments]
+
+
+RECORDED_DIR = Path(__file__).resolve().parent / "recorded"
+
+
+# Bodies are built once per distinct request, so repeated fetches measure the
+# client rather than fixture generation
+@functools.lru_cache(maxsize=64)
+def _article_body(name: str, size: int) -> bytes:
+    return synthetic_html(size).replace("Synthetic article", f"Article {name}").encode("utf-8")
+
+
+@functools.lru_cache(maxsize=16)
+def _reddit_body(depth: int, breadth: int) -> bytes:
+    return json.dumps(synthetic_reddit_thread(depth, breadth)).encode()
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the fixture routes:
+
+    /article/<n>?size=<chars>&delay_ms=<ms>   synthetic article page
+    /recorded/<file>                          saved page from benchmarks/recorded/
+    /reddit/comments/d<depth>b<breadth>.json  synthetic Reddit thread
+    /youtube/oembed                           oEmbed metadata
+    """
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        delay_ms = int(params.get("delay_ms", ["0"])[0])
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        if parsed.path.startswith("/article/"):
+            size = int(params.get("size", ["50000"])[0])
+            self._send(_article_body(parsed.path.rsplit("/", 1)[-1], size), "text/html; charset=utf-8")
+        elif parsed.path.startswith("/recorded/"):
+            path = RECORDED_DIR / Path(parsed.path).name
+            if not path.is_file():
+                self.send_error(404)
+                return
+            self._send(path.read_bytes(), "text/html")
+        elif parsed.path.startswith("/reddit/comments/"):
+            match = re.search(r"/d(\d+)b(\d+)", parsed.path)
+            if not match:
+                self.send_error(404)
+                return
+            self._send(_reddit_body(int(match.group(1)), int(match.group(2))), "application/json")
+        elif parsed.path == "/youtube/oembed":
+            data = {"title": "Synthetic video", "author_name": "Benchmark channel"}
+            self._send(json.dumps(data).encode(), "application/json")
+        else:
+            self.send_error(404)
+
+    def _send(self, data: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading early (e.g. at WEB_MAX_BYTES)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Handle on a fixture server running in a child process."""
+
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+
+    def shutdown(self):
+        self.proc.stdin.close()  # the child exits when its stdin closes
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def serve_fixtures() -> tuple[FixtureServer, str]:
+    """Start a fixture server on a free port; returns (server, base URL).
+
+    The server runs in a child process so that building and sending fixture
+    bodies doesn't show up in the caller's timings, tracemalloc peaks or RSS.
+    """
+    proc = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve())],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    base_url = proc.stdout.readline().strip()
+    if not base_url:
+        proc.wait()
+        raise RuntimeError("Fixture server failed to start")
+    return FixtureServer(proc), base_url
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=lambda: (sys.stdin.read(), server.shutdown()), daemon=True).start()
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    server.serve_forever()
@@ -0,0 +1,273 @@
+"""Offline load test for MARVINBot.
+
+Drives the bot's message handler with synthetic updates from several
+chats at once. Claude is replaced by a scripted stub with configurable
+latency, links point at a local fixture server (in a child process, so it
+doesn't count towards the reported memory), and files live in a temporary
+workspace, so no network access or API key is needed.
+
+The stub answers like a tool-using model: links in a message are fetched
+with fetch_url, "search ..." requests then run search_files, and the turn
+ends with a text reply. Reports throughput, per-turn latency percentiles,
+per-tool timings and memory.
+
+Usage:
+    python benchmarks/load_test.py [--chats 8] [--turns 5] [--model-latency 0.2]
+    python benchmarks/load_test.py --trace conversations.jsonl --json results.json
+
+A trace file has one {"chat": <id>, "text": "<message>"} object per line;
+turns of the same chat are replayed in order, chats run concurrently.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fixtures import serve_fixtures
+
+MESSAGE_TEMPLATES = (
+    "hey, how's it going?",
+    "what do you think of this? {url}",
+    "summarize {url}",
+    "search my notes for MARVIN",
+    "compare {url} and {url2}, then search notes for café",
+    "thanks!",
+)
+
+
+class TextBlock:
+    type = "text"
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ToolUseBlock:
+    type = "tool_use"
+
+    def __init__(self, id: str, name: str, input: dict):
+        self.id = id
+        self.name = name
+        self.input = input
+
+
+class StubMessages:
+    """Scripted stand-in for client.messages with a simulated model latency."""
+
+    def __init__(self, latency: float, jitter: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._ids = 0
+
+    def _tool(self, name: str, tool_input: dict) -> ToolUseBlock:
+        self._ids += 1
+        return ToolUseBlock(f"toolu_{self._ids:06d}", name, tool_input)
+
+    def create(self, model: str, messages: list, max_tokens: int = 1024, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+        # The turn starts at the last plain-text user message; count tool rounds since then
+        start = max(i for i, m in enumerate(messages) if m["role"] == "user" and isinstance(m["content"], str))
+        text = messages[start]["content"]
+        rounds = sum(1 for m in messages[start:] if m["role"] == "assistant")
+
+        urls = re.findall(r"https?://[^\s,]+", text)
+        search = re.search(r"search (?:my )?notes for (\S+)", text)
+        content = None
+        if rounds == 0 and urls:
+            content = [TextBlock("Let me look at that.")] + [self._tool("fetch_url", {"url": u}) for u in urls]
+        elif search and rounds == (1 if urls else 0):
+            content = [self._tool("search_files", {"query": search.group(1)})]
+
+        prompt_chars = len(json.dumps(messages, default=lambda o: vars(o)))
+        usage = SimpleNamespace(input_tokens=prompt_chars // 4, output_tokens=50)
+        if content:
+            return SimpleNamespace(stop_reason="tool_use", content=content, usage=usage)
+        reply = f"Here's my take on: {text[:80]}"
+        return SimpleNamespace(stop_reason="end_turn", content=[TextBlock(reply)], usage=usage)
+
+
+class StubClient:
+    def __init__(self, latency: float, jitter: float):
+        self.messages = StubMessages(latency, jitter)
+
+
+def make_update(chat_id: int, text: str, replies: list):
+    """Minimal stand-in for a telegram Update carrying a text message."""
+
+    async def reply_text(reply, **kwargs):
+        replies.append(reply)
+
+    async def reply_document(**kwargs):
+        replies.append("[document]")
+
+    async def send_action(action):
+        pass
+
+    message = SimpleNamespace(
+        text=text,
+        reply_text=reply_text,
+        reply_document=reply_document,
+        chat=SimpleNamespace(send_action=send_action),
+    )
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(id=chat_id),
+        effective_chat=SimpleNamespace(id=chat_id),
+        message=message,
+    )
+
+
+def build_workspace(root: Path):
+    """A small MARVIN workspace for the file tools to work on."""
+    (root / "content").mkdir(parents=True)
+    (root / "sessions").mkdir()
+    (root / "CLAUDE.md").write_text("# MARVIN\n\nLoad-test workspace.\n")
+    for i in range(50):
+        (root / "content" / f"note-{i}.md").write_text(
+            f"# Note {i}\n\n" + "MARVIN keeps notes about the café and other things.\n" * 40
+        )
+
+
+def generate_trace(chats: int, turns: int, base_url: str, pages: int, page_size: int) -> list[dict]:
+    """Synthetic conversations; links repeat across chats so caches get exercised."""
+    rng = random.Random(42)
+    trace = []
+    for turn in range(turns):
+        for chat in range(1, chats + 1):
+            template = rng.choice(MESSAGE_TEMPLATES)
+            url, url2 = (f"{base_url}/article/{rng.randrange(pages)}?size={page_size}" for _ in range(2))
+            trace.append({"chat": chat, "text": template.format(url=url, url2=url2)})
+    return trace
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def replay(bot, trace: list[dict]) -> tuple[list[float], float]:
+    """Replay turns, one task per chat. Returns per-turn latencies and wall time."""
+    by_chat: dict[int, list[str]] = {}
+    for entry in trace:
+        by_chat.setdefault(entry["chat"], []).append(entry["text"])
+
+    latencies = []
+
+    async def run_chat(chat_id: int, texts: list[str]):
+        replies = []
+        for text in texts:
+            started = time.monotonic()
+            await bot.handle_message(make_update(chat_id, text, replies), None)
+            latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(run_chat(chat_id, texts) for chat_id, texts in by_chat.items()))
+    return latencies, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for MARVINBot")
+    parser.add_argument("--chats", type=int, default=8, help="Concurrent chats (synthetic trace)")
+    parser.add_argument("--turns", type=int, default=5, help="Messages per chat (synthetic trace)")
+    parser.add_argument("--trace", type=Path, help="Replay this JSONL conversation trace instead")
+    parser.add_argument("--model-latency", type=float, default=0.2, help="Stub Claude latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Latency jitter as a fraction")
+    parser.add_argument("--pages", type=int, default=10, help="Distinct fixture pages linked")
+    parser.add_argument("--page-size", type=int, default=50000, help="Fixture page size in chars")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report Python heap peak (slower)")
+    parser.add_argument("--json", type=Path, help="Write results to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ANTHROPIC_API_KEY", "offline-load-test")
+    import telegram_bot
+    from metrics import TOOL_SECONDS
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    server, base_url = serve_fixtures()
+    with tempfile.TemporaryDirectory(prefix="marvin-load-") as tmp:
+        workspace = Path(tmp) / "workspace"
+        build_workspace(workspace)
+        telegram_bot.MARVIN_ROOT = workspace
+        telegram_bot.CLAUDE_MD_PATH = workspace / "CLAUDE.md"
+        telegram_bot.DB_PATH = Path(tmp) / "telegram.db"
+        telegram_bot.SPILL_DIR = Path(tmp) / "payloads"
+
+        bot = telegram_bot.MARVINBot("load-test", [], trace_path=None)
+        client = StubClient(args.model_latency, args.jitter)
+        bot.claude = client
+        # The fixture server is local; don't let the per-host rate limit dominate
+        bot.fetcher.limiter.limits = {"127.0.0.1": (1000.0, 1000)}
+
+        if args.trace:
+            with open(args.trace, encoding="utf-8") as f:
+                trace = [json.loads(line) for line in f if line.strip()]
+        else:
+            trace = generate_trace(args.chats, args.turns, base_url, args.pages, args.page_size)
+
+        if not trace:
+            parser.error("no turns to replay")
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        latencies, wall = asyncio.run(replay(bot, trace))
+        heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+        tracemalloc.stop()
+    server.shutdown()
+
+    ordered = sorted(latencies)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    results = {
+        "turns": len(latencies),
+        "chats": len({entry["chat"] for entry in trace}),
+        "wall_seconds": round(wall, 3),
+        "turns_per_second": round(len(latencies) / wall, 2),
+        "latency_ms": {
+            "p50": round(percentile(ordered, 0.5) * 1000, 1),
+            "p95": round(percentile(ordered, 0.95) * 1000, 1),
+            "p99": round(percentile(ordered, 0.99) * 1000, 1),
+            "max": round(ordered[-1] * 1000, 1),
+        },
+        "claude_calls": client.messages.calls,
+        "model_latency_seconds": args.model_latency,
+        "tools": {
+            tool: {"calls": count, "mean_ms": round(total / count * 1000, 1)}
+            for (tool,), (count, total) in TOOL_SECONDS.stats().items()
+        },
+        "peak_rss_mb": round(rss / 1024 / 1024, 1),
+        "heap_peak_mb": round(heap_peak / 1024 / 1024, 1) if heap_peak is not None else None,
+    }
+
+    print(f"Turns: {results['turns']} from {results['chats']} chats in {wall:.2f}s "
+          f"({results['turns_per_second']} turns/s)")
+    latency = results["latency_ms"]
+    print(f"Turn latency: p50 {latency['p50']}ms, p95 {latency['p95']}ms, "
+          f"p99 {latency['p99']}ms, max {latency['max']}ms")
+    print(f"Claude calls: {results['claude_calls']} (stub latency {args.model_latency}s)")
+    for tool, stats in sorted(results["tools"].items()):
+        print(f"  {tool:<16} {stats['calls']:>5} calls, mean {stats['mean_ms']}ms")
+    print(f"Peak RSS: {results['peak_rss_mb']} MB"
+          + (f", Python heap peak: {results['heap_peak_mb']} MB" if heap_peak is not None else ""))
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
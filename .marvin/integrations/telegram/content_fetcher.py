@@ -3,94 +3,1138 @@
 Extracts content from URLs: YouTube, Reddit, Twitter, web pages.
 """
 
+import asyncio
+import codecs
+import contextvars
+import logging
 import re
 import json
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 from dataclasses import dataclass
-from typing import Optional
-from urllib.parse import urlparse, parse_qs
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable, Iterator, Optional
+from urllib.parse import urldefrag, urlparse, parse_qs, parse_qsl, urlencode, urlunparse
 
 import requests
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from html_extract import SNIFF_BYTES, detect_encoding, extract_main_content, extract_text
+from metrics import CACHE_LOOKUPS, FETCH_SECONDS, QUEUE_DEPTH
+from tracing import span
+from spill import SpillStore, SpilledValue
+
+if TYPE_CHECKING:
+    # Imported on first YouTube fetch; most fetches never need it
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+logger = logging.getLogger(__name__)
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as m:ss or h:mm:ss."""
+    mins, secs = divmod(int(seconds), 60)
+    hours, mins = divmod(mins, 60)
+    if hours:
+        return f"{hours}:{mins:02d}:{secs:02d}"
+    return f"{mins}:{secs:02d}"
+
+
+def parse_timestamp(value) -> float:
+    """Parse seconds, "m:ss" or "h:mm:ss" into seconds.
+
+    Raises ValueError for anything else, e.g. "1h05m" or "beginning".
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().split(":")
+        if len(parts) > 3:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part or 0)
+    # float() also accepts "nan", "inf" and "-5"
+    if not 0 <= seconds < float("inf"):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    return seconds
+
+
+class TranscriptSegments:
+    """Compact transcript storage with on-demand formatting.
+
+    Segment start times and durations live in float arrays, and all segment
+    text is kept in one string indexed by an offsets array, instead of one
+    Python object per segment.
+    """
+
+    __slots__ = ("starts", "durations", "offsets", "text")
+
+    def __init__(self, starts: array, durations: array, offsets: array, text: str):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets  # len(segments) + 1 entries into text
+        self.text = text
+
+    @classmethod
+    def from_snippets(cls, snippets) -> "TranscriptSegments":
+        """Build from objects with start, duration and text attributes."""
+        starts = array("d")
+        durations = array("d")
+        offsets = array("I")
+        parts = []
+        pos = 0
+        for snippet in snippets:
+            text = " ".join(snippet.text.split())
+            starts.append(snippet.start)
+            durations.append(snippet.duration)
+            offsets.append(pos)
+            parts.append(text)
+            pos += len(text) + 1  # joined with a single space
+        offsets.append(pos)
+        return cls(starts, durations, offsets, " ".join(parts))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        """End time of the last segment in seconds."""
+        if not self.starts:
+            return 0.0
+        return self.starts[-1] + self.durations[-1]
+
+    def segment_text(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1] - 1]
+
+    def format_line(self, index: int) -> str:
+        return f"[{format_timestamp(self.starts[index])}] {self.segment_text(index)}"
+
+    def format(self, start: Optional[float] = None, end: Optional[float] = None) -> str:
+        """Format segments in [start, end) as timestamped lines."""
+        text, _ = self.format_window(start, end)
+        return text
+
+    def format_window(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        max_chars: Optional[int] = None,
+        first: Optional[int] = None,
+    ) -> tuple[str, Optional[int]]:
+        """Format segments in [start, end), stopping at max_chars.
+
+        Returns the text and the index of the first segment left out, or None
+        if the whole range fit. Pass that index back as `first` to continue
+        exactly where the window stopped; resuming from its start time instead
+        may repeat segments that share that time, but never skips one.
+        """
+        if first is None:
+            first = self.index_at(start) if start else 0
+        last = bisect_left(self.starts, end) if end is not None else len(self)
+
+        lines = []
+        size = 0
+        for index in range(first, last):
+            line = self.format_line(index)
+            if max_chars is not None and lines and size + len(line) + 1 > max_chars:
+                return "\n".join(lines), index
+            lines.append(line)
+            size += len(line) + 1
+
+        return "\n".join(lines), None
+
+    def index_at(self, start: float) -> int:
+        """Index of the first segment to show from `start`.
+
+        That is the first segment starting at `start`, or the one already
+        playing then, together with any segments sharing its start time.
+        """
+        index = bisect_left(self.starts, start)
+        if index == len(self) or self.starts[index] > start:
+            if index == 0:
+                return 0
+            index = bisect_left(self.starts, self.starts[index - 1])
+        return index
+
+    def search(self, query: str, context: int = 1, max_matches: int = 20) -> str:
+        """Return segments matching query (case-insensitive) with surrounding context."""
+        needle = query.lower().strip()
+        if not needle:
+            return ""
+
+        haystack = self.text.lower()
+        hits = []
+        pos = haystack.find(needle)
+        while pos != -1 and len(hits) < max_matches:
+            index = bisect_right(self.offsets, pos) - 1
+            if not hits or hits[-1] != index:
+                hits.append(index)
+            pos = haystack.find(needle, pos + len(needle))
+
+        # Merge overlapping context windows
+        windows = []
+        for index in hits:
+            lo, hi = max(index - context, 0), min(index + context + 1, len(self))
+            if windows and lo <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], hi)
+            else:
+                windows.append([lo, hi])
+
+        return "\n...\n".join(
+            "\n".join(self.format_line(i) for i in range(lo, hi))
+            for lo, hi in windows
+        )
 
 
-@dataclass
 class FetchedContent:
-    """Represents fetched content from a URL."""
-    url: str
-    platform: str  # youtube, reddit, twitter, web
-    title: Optional[str] = None
-    content: Optional[str] = None
-    transcript: Optional[str] = None
-    author: Optional[str] = None
-    metadata: Optional[dict] = None
-    error: Optional[str] = None
+    """Represents fetched content from a URL.
+
+    Slotted to keep per-result overhead small. The large fields (content,
+    transcript, metadata, segments) can be moved to a SpillStore with
+    spill(); they are then loaded from disk each time they are read.
+    """
+
+    __slots__ = ("url", "platform", "title", "author", "error",
+                 "_content", "_transcript", "_metadata", "_segments")
+
+    def __init__(
+        self,
+        url: str,
+        platform: str,  # youtube, reddit, twitter, web
+        title: Optional[str] = None,
+        content: Optional[str] = None,
+        transcript: Optional[str] = None,
+        author: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        error: Optional[str] = None,
+        segments: Optional[TranscriptSegments] = None,  # timed transcript, formatted on demand
+    ):
+        self.url = url
+        self.platform = platform
+        self.title = title
+        self.author = author
+        self.error = error
+        self._content = content
+        self._transcript = transcript
+        self._metadata = metadata
+        self._segments = segments
+
+    @staticmethod
+    def _load(value):
+        if not isinstance(value, SpilledValue):
+            return value
+        try:
+            return value.load()
+        except FileNotFoundError:
+            logger.warning(f"Spilled payload {value.digest} is gone")
+            return None
+
+    content = property(
+        lambda self: self._load(self._content),
+        lambda self, value: setattr(self, "_content", value),
+    )
+    transcript = property(
+        lambda self: self._load(self._transcript),
+        lambda self, value: setattr(self, "_transcript", value),
+    )
+    metadata = property(
+        lambda self: self._load(self._metadata),
+        lambda self, value: setattr(self, "_metadata", value),
+    )
+    segments = property(
+        lambda self: self._load(self._segments),
+        lambda self, value: setattr(self, "_segments", value),
+    )
+
+    def spill(self, store: SpillStore):
+        """Move large fields to the store, keeping small ones in memory."""
+        self._content = store.maybe_spill(self._content)
+        self._transcript = store.maybe_spill(self._transcript)
+        self._metadata = store.maybe_spill(self._metadata)
+        self._segments = store.maybe_spill(self._segments)
+
+    def has_transcript(self) -> bool:
+        """Whether a transcript is present, without loading it."""
+        return self._segments is not None or bool(self._transcript)
+
+    def transcript_text(self) -> Optional[str]:
+        """Full transcript text, formatting segments if needed."""
+        segments = self.segments
+        if segments is not None:
+            return segments.format()
+        return self.transcript
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name.lstrip('_')}={getattr(self, name)!r}"
+            for name in self.__slots__
+            if getattr(self, name) is not None
+        )
+        return f"FetchedContent({fields})"
+
+
+@dataclass(frozen=True)
+class CanonicalURL:
+    """Canonical identity shared by all variants of a URL."""
+    platform: str
+    key: str  # cache/dedup key, e.g. "youtube:dQw4w9WgXcQ" or "reddit:1abcde"
+    url: str  # URL that is actually fetched (as given, minus the fragment, for generic pages)
+    error: Optional[str] = None  # set when the URL can't be parsed (e.g. a non-numeric port)
+
+
+# Query parameters that only record where a link was shared from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "igsh",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "si", "feature", "ref_src", "ref_url",
+}
+
+YOUTUBE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+YOUTUBE_LIST_RE = re.compile(r"^[A-Za-z0-9_-]{10,}$")
+YOUTUBE_CHANNEL_RE = re.compile(r"^/(@[^/]+|channel/UC[A-Za-z0-9_-]{22}|c/[^/]+|user/[^/]+)")
+YOUTUBE_CHANNEL_ID_RE = re.compile(r'"(?:externalId|channelId)":"(UC[A-Za-z0-9_-]{22})"')
+YOUTUBE_PLAYLIST_VIDEO_RE = re.compile(r'"playlistVideoRenderer":\{"videoId":"([A-Za-z0-9_-]{11})"')
+YOUTUBE_ANY_VIDEO_RE = re.compile(r'"videoId":"([A-Za-z0-9_-]{11})"')
+REDDIT_POST_RE = re.compile(r"/comments/([a-z0-9]+)", re.IGNORECASE)
+REDDIT_COMMENT_ID_RE = re.compile(r"^[a-z0-9]+$")
+
+# Fetch cache settings
+CACHE_TTL = 60 * 60  # seconds
+NEGATIVE_CACHE_TTL = 5 * 60  # seconds a failed fetch is remembered
+CACHE_MAX_ENTRIES = 256
+
+# Concurrent fetch settings
+FETCH_CONCURRENCY = 8
+PER_HOST_CONCURRENCY = 2
+FETCH_TIMEOUT = 30  # seconds, per URL
+SUBREQUEST_WORKERS = 8  # leaf requests issued alongside a fetch (e.g. oEmbed)
+PREFETCH_WORKERS = 4
+PREFETCH_MAX_LINKS = 5  # links per message fetched before they are asked for
+
+# Web page settings
+WEB_MAX_BYTES = 2 * 1024 * 1024  # stop reading the body after this much
+WEB_CHUNK_BYTES = 16 * 1024
+WEB_MAX_CHARS = 5000
+WEB_MODES = ("main", "text")  # main: article body + metadata, text: all visible text
+
+# Reddit settings
+REDDIT_COMMENT_LIMIT = 10  # comments requested per listing
+REDDIT_COMMENT_DEPTH = 3  # reply levels requested per listing
+REDDIT_COMMENT_CHARS = 500
+REDDIT_COMMENTS_MAX_CHARS = 6000
+REDDIT_MORE_BATCH = 20  # unloaded comment IDs expanded per page
+REDDIT_KEEP_FIELDS = {
+    "kind", "data", "children", "json", "things",
+    "id", "title", "author", "selftext", "url", "subreddit", "score",
+    "num_comments", "created_utc", "body", "replies", "parent_id", "count",
+}
+
+# Playlist/channel batch settings
+PLAYLIST_MAX_VIDEOS = 50
+PLAYLIST_CONCURRENCY = 4
+PLAYLIST_FETCH_TIMEOUT = 300  # seconds, for a whole playlist
+
+# HTTP transport settings
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+CONNECT_TIMEOUT = 3.05  # seconds; slightly over a TCP retransmit window
+READ_TIMEOUT = 10
+WEB_READ_TIMEOUT = 15
+POOL_CONNECTIONS = 16  # hosts with pooled connections
+POOL_MAXSIZE = 16  # pooled connections per host
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled per attempt
+RETRY_JITTER = 0.5  # seconds of random jitter added per attempt
+RETRY_BACKOFF_MAX = 8
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+YOUTUBE_HOST = "www.youtube.com"
+# oEmbed has its own circuit, so in the half-open state its lookup can't take
+# the probe slot that the transcript request needs
+YOUTUBE_OEMBED_CIRCUIT = "www.youtube.com/oembed"
+
+# Token-bucket limits per host: (requests per second, burst)
+HOST_RATE_LIMITS = {
+    "www.reddit.com": (1.0, 5),
+    YOUTUBE_HOST: (4.0, 8),
+    "api.instagram.com": (0.5, 2),
+}
+DEFAULT_RATE_LIMIT = (10.0, 20)
+
+# Circuit breaker settings
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before a host is skipped
+CIRCUIT_RESET_TIMEOUT = 60  # seconds before a single probe request is let through
+
+
+def _trim_reddit_object(obj: dict) -> dict:
+    """json.loads object_hook that drops Reddit fields we never read."""
+    return {k: v for k, v in obj.items() if k in REDDIT_KEEP_FIELDS}
+
+
+def format_comment_tree(comments: list[dict], max_chars: int = REDDIT_COMMENTS_MAX_CHARS) -> str:
+    """Render nested Reddit comments as indented lines, within a character budget."""
+    lines = []
+    size = 0
+
+    def walk(items: list[dict], depth: int) -> bool:
+        nonlocal size
+        for comment in items:
+            body = " ".join((comment.get("body") or "").split())
+            line = f"{'  ' * depth}- [{comment.get('id')}] u/{comment.get('author')} ({comment.get('score')}): {body}"
+            if size + len(line) > max_chars:
+                lines.append(f"{'  ' * depth}- ...")
+                return False
+            lines.append(line)
+            size += len(line) + 1
+            if comment.get("replies") and not walk(comment["replies"], depth + 1):
+                return False
+            if comment.get("more_replies"):
+                lines.append(
+                    f"{'  ' * (depth + 1)}- [+{comment['more_replies']} more replies; "
+                    f"expand with comment_id={comment.get('id')}]"
+                )
+        return True
+
+    walk(comments, 0)
+    return "\n".join(lines)
+
+
+def _strip_trailing_punctuation(url: str) -> str:
+    """Drop sentence punctuation picked up after a URL, keeping balanced parentheses.
+
+    "(see https://en.wikipedia.org/wiki/Python_(programming_language))." keeps
+    the ")" that closes "(programming_language" but not the one after it.
+    """
+    while url:
+        if url[-1] in ".,;:!?'":
+            url = url[:-1]
+        elif url[-1] == ")" and url.count(")") > url.count("("):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a web URL: lowercase host, drop fragment, default port and tracking params."""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower() or "https"
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    path = parsed.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One token bucket per host, created on first use."""
+
+    def __init__(self, limits: dict = HOST_RATE_LIMITS, default: tuple = DEFAULT_RATE_LIMIT):
+        self.limits = limits
+        self.default = default
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str):
+        """Block until a request to `host` may start."""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(*self.limits.get(host, self.default))
+                self._buckets[host] = bucket
+        bucket.acquire()
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of making a request while a host's circuit is open."""
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when a fetch runs out of time allowed by fetch_async's timeout.
+
+    It says nothing about the host's health, so it never trips a breaker.
+    """
+
+
+# Monotonic time by which the current fetch must finish (set by fetch_async)
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("fetch_deadline", default=None)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left before the current fetch's deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline():
+    """Raise DeadlineExceeded if the current fetch's deadline has passed."""
+    remaining = time_left()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Fetch deadline passed")
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+
+    A host's circuit opens after `threshold` consecutive failures. Requests
+    then fail immediately until `reset_timeout` has passed, after which one
+    probe request is allowed (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        # host -> [consecutive failures, opened at (or None), probe in flight]
+        self._hosts: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def before_request(self, host: str):
+        """Raise CircuitOpenError unless a request to `host` may go ahead."""
+        with self._lock:
+            state = self._hosts.get(host)
+            if not state or state[1] is None:
+                return
+            remaining = state[1] + self.reset_timeout - time.monotonic()
+            if remaining > 0 or state[2]:
+                self._local.rejected = True
+                raise CircuitOpenError(
+                    f"{host} is failing; skipping requests for {max(int(remaining), 1)}s"
+                )
+            state[2] = True  # half-open: this request is the probe
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            state = self._hosts.setdefault(host, [0, None, False])
+            state[0] += 1
+            if state[2] or state[0] >= self.threshold:
+                state[1] = time.monotonic()
+                state[2] = False
+
+    def release(self, host: str):
+        """End a request we gave up on ourselves, counting neither success nor failure.
+
+        If it was a half-open probe, the next request may probe instead.
+        """
+        with self._lock:
+            state = self._hosts.get(host)
+            if state:
+                state[2] = False
+
+    def pop_rejected(self) -> bool:
+        """Whether a request on this thread was refused since the last call."""
+        rejected = getattr(self._local, "rejected", False)
+        self._local.rejected = False
+        return rejected
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            state = self._hosts.get(host)
+            return bool(state and state[1] is not None)
+
+
+def _log_prefetch_error(future: Future):
+    if future.exception():
+        logger.warning(f"Prefetch failed: {future.exception()}")
+
+
+class DeadlineRetry(Retry):
+    """Retry that gives up, and never sleeps, past the current fetch's deadline."""
+
+    def increment(self, *args, **kwargs):
+        remaining = time_left()
+        retry = self.new(total=0) if remaining is not None and remaining <= 0 else self
+        return Retry.increment(retry, *args, **kwargs)
+
+    def get_backoff_time(self) -> float:
+        return self._clamp(super().get_backoff_time())
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else self._clamp(retry_after)
+
+    @staticmethod
+    def _clamp(seconds: float) -> float:
+        remaining = time_left()
+        return seconds if remaining is None else max(min(seconds, remaining), 0)
+
+
+def build_session() -> requests.Session:
+    """Create a session with tuned connection pools and retries on idempotent requests."""
+    retry = DeadlineRetry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        backoff_jitter=RETRY_JITTER,
+        backoff_max=RETRY_BACKOFF_MAX,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the final response back instead of raising
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+def host_matches(host: str, suffix: str) -> bool:
+    """True if host is `suffix` or one of its subdomains."""
+    return host == suffix or host.endswith("." + suffix)
+
+
+@dataclass(frozen=True)
+class Platform:
+    """A fetcher registered for a set of hosts.
+
+    `fetch(fetcher, url, platform_name)` returns FetchedContent. The optional
+    `canonicalize(fetcher, url)` returns a CanonicalURL, or None to fall back
+    to plain URL normalization. If `patterns` are given, a URL must also
+    match one of them.
+    """
+    name: str
+    fetch: Callable
+    hosts: tuple[str, ...]
+    patterns: tuple[re.Pattern, ...] = ()
+    canonicalize: Optional[Callable] = None
+
+
+class PlatformRegistry:
+    """Resolves URLs to platforms through a reversed-domain suffix table.
+
+    Hosts are stored as reversed label tuples ("www.youtube.com" ->
+    ("com", "youtube", "www")), so resolving a host checks at most one
+    dict entry per label, however many platforms are registered.
+    """
+
+    def __init__(self):
+        self._by_name: dict[str, Platform] = {}
+        self._by_suffix: dict[tuple[str, ...], list[Platform]] = {}
+
+    def register(
+        self,
+        name: str,
+        fetch: Callable,
+        hosts: Iterable[str],
+        patterns: Iterable[str] = (),
+        canonicalize: Optional[Callable] = None,
+    ) -> Platform:
+        """Register a fetcher for hosts (and their subdomains), replacing any of the same name."""
+        if name in self._by_name:
+            self.unregister(name)
+
+        platform = Platform(
+            name=name,
+            fetch=fetch,
+            hosts=tuple(h.lower() for h in hosts),
+            patterns=tuple(re.compile(p) for p in patterns),
+            canonicalize=canonicalize,
+        )
+        self._by_name[name] = platform
+        for host in platform.hosts:
+            self._by_suffix.setdefault(tuple(reversed(host.split("."))), []).append(platform)
+        return platform
+
+    def unregister(self, name: str):
+        """Remove a platform by name."""
+        platform = self._by_name.pop(name, None)
+        if not platform:
+            return
+        for host in platform.hosts:
+            key = tuple(reversed(host.split(".")))
+            remaining = [p for p in self._by_suffix.get(key, []) if p.name != name]
+            if remaining:
+                self._by_suffix[key] = remaining
+            else:
+                self._by_suffix.pop(key, None)
+
+    def get(self, name: str) -> Optional[Platform]:
+        return self._by_name.get(name)
+
+    def resolve(self, url: str) -> Optional[Platform]:
+        """Return the platform for a URL, preferring the longest matching host suffix."""
+        host = (urlparse(url).hostname or "").lower()
+        labels = tuple(reversed(host.split(".")))
+        for length in range(len(labels), 0, -1):
+            for platform in self._by_suffix.get(labels[:length], ()):
+                if not platform.patterns or any(p.search(url) for p in platform.patterns):
+                    return platform
+        return None
 
 
 class ContentFetcher:
     """Fetches and extracts content from various platforms."""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        })
+    def __init__(
+        self,
+        web_mode: str = "main",
+        registry: Optional["PlatformRegistry"] = None,
+        spill_dir: Optional[Path] = None,
+    ):
+        if web_mode not in WEB_MODES:
+            raise ValueError(f"web_mode must be one of {WEB_MODES}")
+        self.web_mode = web_mode
+        self.registry = registry or PLATFORMS
+        # Large payloads of fetched results are kept on disk when set
+        self.spill = SpillStore(spill_dir) if spill_dir else None
+        self.session = build_session()
+        self.limiter = HostRateLimiter()
+        self.breaker = CircuitBreaker()
+        self._cache: OrderedDict[str, tuple[float, FetchedContent]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Leaf sub-requests only; tasks here must never wait on each other
+        self._subrequests = ThreadPoolExecutor(
+            max_workers=SUBREQUEST_WORKERS, thread_name_prefix="fetch-sub"
+        )
+        # Speculative fetches; separate from _subrequests since fetch() waits on those
+        self._prefetches = ThreadPoolExecutor(
+            max_workers=PREFETCH_WORKERS, thread_name_prefix="fetch-prefetch"
+        )
+        self._inflight: dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        QUEUE_DEPTH.set_function(lambda: len(self._inflight), queue="fetch_inflight")
+        QUEUE_DEPTH.set_function(lambda: self._prefetches._work_queue.qsize(), queue="prefetch")
+        QUEUE_DEPTH.set_function(lambda: self._subrequests._work_queue.qsize(), queue="fetch_subrequests")
+        # YouTubeTranscriptApi is not thread-safe, so keep one per thread
+        self._youtube_local = threading.local()
 
     def detect_platform(self, url: str) -> str:
         """Detect which platform a URL belongs to."""
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-
-        if "youtube.com" in domain or "youtu.be" in domain:
-            return "youtube"
-        elif "reddit.com" in domain or "redd.it" in domain:
-            return "reddit"
-        elif "twitter.com" in domain or "x.com" in domain:
-            return "twitter"
-        elif "instagram.com" in domain:
-            return "instagram"
-        elif "linkedin.com" in domain:
-            return "linkedin"
-        else:
-            return "web"
+        platform = self.registry.resolve(url)
+        return platform.name if platform else "web"
+
+    def canonicalize(self, url: str) -> CanonicalURL:
+        """Map a URL to its canonical identity (video ID, post ID or normalized URL)."""
+        try:
+            platform = self.registry.resolve(url)
+            name = platform.name if platform else "web"
+
+            if platform and platform.canonicalize:
+                canonical = platform.canonicalize(self, url)
+                if canonical:
+                    return canonical
+
+            normalized = normalize_url(url)
+        except ValueError as e:
+            # urlparse rejects e.g. "host:PORT" or unbalanced IPv6 brackets
+            return CanonicalURL(platform="web", key=f"invalid:{url}", url=url, error=f"Invalid URL: {e}")
+        # The normalized form only keys the cache: servers may route on trailing
+        # slashes, parameter order or parameters we consider tracking
+        return CanonicalURL(platform=name, key=f"{name}:{normalized}", url=urldefrag(url.strip())[0])
+
+    def _canonical_youtube(self, url: str) -> Optional[CanonicalURL]:
+        video_id = self._extract_youtube_id(url)
+        if video_id:
+            return CanonicalURL(
+                platform="youtube",
+                key=f"youtube:{video_id}",
+                url=f"https://www.youtube.com/watch?v={video_id}",
+            )
+        playlist_id = self._extract_youtube_playlist_id(url)
+        if playlist_id:
+            return CanonicalURL(
+                platform="youtube",
+                key=f"youtube:playlist:{playlist_id}",
+                url=f"https://www.youtube.com/playlist?list={playlist_id}",
+            )
+        channel = self._extract_youtube_channel(url)
+        if channel:
+            return CanonicalURL(
+                platform="youtube",
+                key=f"youtube:channel:{channel}",
+                url=f"https://www.youtube.com/{channel}",
+            )
+        return None
+
+    def _canonical_reddit(self, url: str) -> Optional[CanonicalURL]:
+        post_id = self._extract_reddit_id(url)
+        if post_id:
+            return CanonicalURL(
+                platform="reddit",
+                key=f"reddit:{post_id}",
+                url=f"https://www.reddit.com/comments/{post_id}",
+            )
+        return None
+
+    def _canonical_twitter(self, url: str) -> Optional[CanonicalURL]:
+        # Query strings on tweets (?s=20&t=...) are share tracking only
+        normalized = normalize_url(url).split("?")[0]
+        return CanonicalURL(platform="twitter", key=f"twitter:{normalized}", url=normalized)
 
     def fetch(self, url: str) -> FetchedContent:
         """Fetch content from any supported URL."""
-        platform = self.detect_platform(url)
-
-        fetchers = {
-            "youtube": self._fetch_youtube,
-            "reddit": self._fetch_reddit,
-            "twitter": self._fetch_twitter,
-            "instagram": self._fetch_instagram,
-            "linkedin": self._fetch_linkedin,
-            "web": self._fetch_web,
-        }
+        canonical = self.canonicalize(url)
+        if canonical.error:
+            return FetchedContent(url=url, platform=canonical.platform, error=canonical.error)
+
+        cached = self._cache_get(canonical.key)
+        if cached:
+            CACHE_LOOKUPS.inc(cache="fetch", result="hit")
+            return cached
 
-        fetcher = fetchers.get(platform, self._fetch_web)
-        return fetcher(url, platform)
+        # Single flight: a fetch already running for this key (e.g. a prefetch) is joined
+        with self._inflight_lock:
+            inflight = self._inflight.get(canonical.key)
+            if inflight is None:
+                future = self._inflight[canonical.key] = Future()
+        if inflight is not None:
+            CACHE_LOOKUPS.inc(cache="fetch", result="inflight")
+            with span("fetch.wait", platform=canonical.platform):
+                remaining = time_left()
+                try:
+                    return inflight.result(timeout=None if remaining is None else max(remaining, 0))
+                except FutureTimeoutError:
+                    return FetchedContent(url=url, platform=canonical.platform, error="Timed out")
+        CACHE_LOOKUPS.inc(cache="fetch", result="miss")
+
+        try:
+            platform = self.registry.get(canonical.platform)
+            fetcher = platform.fetch if platform else ContentFetcher._fetch_web
+            started = time.monotonic()
+            self.breaker.pop_rejected()  # clear any refusal left over from an earlier fetch
+            with span("fetch", platform=canonical.platform) as fetch_span:
+                result = fetcher(self, canonical.url, canonical.platform)
+                fetch_span.set(
+                    content_chars=len(result.content or ""),
+                    has_transcript=result.has_transcript(),
+                    error=bool(result.error),
+                )
+            circuit_open = self.breaker.pop_rejected()
+            remaining = time_left()
+            expired = remaining is not None and remaining <= 0
+            FETCH_SECONDS.observe(
+                time.monotonic() - started,
+                platform=canonical.platform,
+                outcome="error" if result.error else "ok",
+            )
+            if self.spill:
+                result.spill(self.spill)
+
+            # Failures may be transient, so they are only remembered briefly. Refusals
+            # by an open circuit aren't remembered at all: the breaker already fails
+            # fast, and the circuit may close long before NEGATIVE_CACHE_TTL. Nor are
+            # results that ran out of time, which may be incomplete (e.g. playlists).
+            if not (result.error and circuit_open) and not expired:
+                self._cache_put(canonical.key, result, NEGATIVE_CACHE_TTL if result.error else CACHE_TTL)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[canonical.key]
+
+        return result
+
+    def peek(self, url: str) -> Optional[FetchedContent]:
+        """Return the cached result for a URL, or None, without fetching it."""
+        canonical = self.canonicalize(url)
+        return None if canonical.error else self._cache_get(canonical.key)
+
+    def prefetch(self, urls: list[str], limit: int = PREFETCH_MAX_LINKS):
+        """Start fetching URLs in the background; later fetch() calls pick up the result.
+
+        Playlists and channels are skipped since they are expensive to fetch
+        speculatively.
+        """
+        for url in urls[:limit]:
+            canonical = self.canonicalize(url)
+            if canonical.error or canonical.key.startswith(("youtube:playlist:", "youtube:channel:")):
+                continue
+            # Run in a copy of the caller's context so the fetch is traced under its update
+            context = contextvars.copy_context()
+            self._prefetches.submit(context.run, self.fetch, url).add_done_callback(_log_prefetch_error)
+
+    async def fetch_async(
+        self,
+        url: str,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> FetchedContent:
+        """Fetch a URL in a worker thread without blocking the event loop.
+
+        `timeout` (seconds) defaults to FETCH_TIMEOUT, or PLAYLIST_FETCH_TIMEOUT
+        for playlists and channels; `deadline` (time.monotonic()) can shorten
+        it. The time left is passed down to the HTTP requests, so the worker
+        thread stops soon after the caller gives up instead of running on.
+        """
+        canonical = self.canonicalize(url)
+        if timeout is None:
+            is_batch = canonical.key.startswith(("youtube:playlist:", "youtube:channel:"))
+            timeout = PLAYLIST_FETCH_TIMEOUT if is_batch else FETCH_TIMEOUT
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            return FetchedContent(url=canonical.url, platform=canonical.platform, error="Timed out before starting")
+
+        context = contextvars.copy_context()
+        context.run(_deadline.set, time.monotonic() + timeout)
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(context.run, self.fetch, url), timeout)
+        except asyncio.TimeoutError:
+            return FetchedContent(
+                url=canonical.url,
+                platform=canonical.platform,
+                error=f"Timed out after {timeout:.1f}s",
+            )
+
+    async def iter_fetch(
+        self,
+        urls: list[str],
+        concurrency: int = FETCH_CONCURRENCY,
+        per_host: int = PER_HOST_CONCURRENCY,
+        timeout: Optional[float] = None,
+        timings: Optional[dict[int, float]] = None,
+        total_timeout: Optional[float] = None,
+    ) -> AsyncIterator[tuple[int, FetchedContent]]:
+        """Fetch URLs concurrently, yielding (index, result) as each one finishes.
+
+        `timeout` applies to each URL; `total_timeout` bounds the whole batch,
+        so URLs still waiting for a slot or running when it expires come back
+        with a timeout error. If `timings` is given, it receives the seconds
+        each fetch took by index, excluding time spent waiting for a slot.
+        """
+        deadline = None if total_timeout is None else time.monotonic() + total_timeout
+        overall = asyncio.Semaphore(concurrency)
+        host_limits: dict[str, asyncio.Semaphore] = {}
+
+        async def run(index: int, url: str) -> tuple[int, FetchedContent]:
+            canonical = self.canonicalize(url)
+            host = "" if canonical.error else urlparse(canonical.url).hostname or ""
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+            # Take the host slot first so a busy host doesn't hold global slots
+            async with host_limit, overall:
+                started = time.monotonic()
+                result = await self.fetch_async(url, timeout, deadline)
+                if timings is not None:
+                    timings[index] = time.monotonic() - started
+                return index, result
+
+        tasks = [asyncio.create_task(run(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_many(
+        self,
+        urls: list[str],
+        concurrency: int = FETCH_CONCURRENCY,
+        per_host: int = PER_HOST_CONCURRENCY,
+        timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+    ) -> list[FetchedContent]:
+        """Fetch URLs concurrently and return results in input order.
+
+        URLs with the same canonical identity are only fetched once. See
+        iter_fetch for `timeout` and `total_timeout`.
+        """
+        keys = [self.canonicalize(url).key for url in urls]
+        unique = {}
+        for key, url in zip(keys, urls):
+            unique.setdefault(key, url)
+
+        unique_keys = list(unique)
+        by_key = {}
+        async for index, result in self.iter_fetch(
+            list(unique.values()), concurrency=concurrency, per_host=per_host,
+            timeout=timeout, total_timeout=total_timeout,
+        ):
+            by_key[unique_keys[index]] = result
+
+        return [by_key[key] for key in keys]
+
+    def _cache_get(self, key: str) -> Optional[FetchedContent]:
+        """Return a cached result if it has not expired."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if not entry:
+                return None
+
+            expires_at, result = entry
+            if time.monotonic() > expires_at:
+                del self._cache[key]
+                return None
+
+            self._cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key: str, result: FetchedContent, ttl: float = CACHE_TTL):
+        """Store a result, evicting the least recently used entries."""
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic() + ttl, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+    def _get(
+        self,
+        url: str,
+        read_timeout: float = READ_TIMEOUT,
+        fail_on_client_error: bool = False,
+        circuit: Optional[str] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """GET through the host's circuit breaker and rate limiter, with separate connect/read timeouts.
+
+        Connection errors, 429 and 5xx responses count as host failures; so
+        do 4xx responses when fail_on_client_error is set (for endpoints
+        that reject us rather than a particular URL). `circuit` overrides
+        the breaker key, which defaults to the host.
+        """
+        host = urlparse(url).hostname or ""
+        circuit = circuit or host
+        check_deadline()
+        self.breaker.before_request(circuit)
+        self.limiter.acquire(host)
+
+        # Never wait past the fetch's deadline
+        remaining = time_left()
+        connect_timeout = CONNECT_TIMEOUT if remaining is None else max(min(CONNECT_TIMEOUT, remaining), 0.001)
+        read_timeout = read_timeout if remaining is None else max(min(read_timeout, remaining), 0.001)
+        try:
+            resp = self.session.get(url, timeout=(connect_timeout, read_timeout), **kwargs)
+        except requests.RequestException as e:
+            remaining = time_left()
+            if remaining is not None and remaining <= 0:
+                # Our deadline cut the request short, which says nothing about the host
+                self.breaker.release(circuit)
+                raise DeadlineExceeded("Fetch deadline passed") from e
+            self.breaker.record_failure(circuit)
+            raise
+
+        if resp.status_code in RETRY_STATUSES or (fail_on_client_error and not resp.ok):
+            self.breaker.record_failure(circuit)
+        else:
+            self.breaker.record_success(circuit)
+        return resp
 
     def _extract_youtube_id(self, url: str) -> Optional[str]:
         """Extract video ID from YouTube URL."""
         parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        video_id = None
 
-        if "youtu.be" in parsed.netloc:
-            return parsed.path.lstrip("/")
-
-        if "youtube.com" in parsed.netloc:
+        if host == "youtu.be":
+            video_id = parsed.path.lstrip("/").split("/")[0]
+        elif host_matches(host, "youtube.com") or host_matches(host, "youtube-nocookie.com"):
             if parsed.path == "/watch":
-                return parse_qs(parsed.query).get("v", [None])[0]
-            elif "/shorts/" in parsed.path:
-                return parsed.path.split("/shorts/")[1].split("/")[0]
-            elif "/live/" in parsed.path:
-                return parsed.path.split("/live/")[1].split("/")[0]
+                video_id = parse_qs(parsed.query).get("v", [None])[0]
+            else:
+                for prefix in ("/shorts/", "/live/", "/embed/", "/v/"):
+                    if parsed.path.startswith(prefix):
+                        video_id = parsed.path[len(prefix):].split("/")[0]
+                        break
+
+        if video_id and YOUTUBE_ID_RE.match(video_id):
+            return video_id
+        return None
+
+    def _extract_youtube_playlist_id(self, url: str) -> Optional[str]:
+        """Extract playlist ID from a YouTube URL that isn't a single video."""
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        if not host_matches(host, "youtube.com"):
+            return None
+
+        playlist_id = parse_qs(parsed.query).get("list", [None])[0]
+        if playlist_id and YOUTUBE_LIST_RE.match(playlist_id):
+            return playlist_id
+        return None
+
+    def _extract_youtube_channel(self, url: str) -> Optional[str]:
+        """Extract channel path (@handle, channel/UC..., c/name, user/name) from a YouTube URL."""
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        if not host_matches(host, "youtube.com"):
+            return None
+
+        match = YOUTUBE_CHANNEL_RE.match(parsed.path)
+        return match.group(1) if match else None
+
+    def _extract_reddit_id(self, url: str) -> Optional[str]:
+        """Extract post ID from a Reddit URL (full permalink or redd.it short link)."""
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+
+        if host == "redd.it":
+            post_id = parsed.path.strip("/").split("/")[0]
+            return post_id.lower() or None
+
+        match = REDDIT_POST_RE.search(parsed.path)
+        if match:
+            return match.group(1).lower()
 
         return None
 
     def _fetch_youtube(self, url: str, platform: str) -> FetchedContent:
         """Fetch YouTube video transcript and metadata."""
+        from youtube_transcript_api._errors import (
+            CouldNotRetrieveTranscript,
+            IpBlocked,
+            NoTranscriptFound,
+            RequestBlocked,
+            TranscriptsDisabled,
+            YouTubeRequestFailed,
+        )
+
         video_id = self._extract_youtube_id(url)
 
+        if not video_id and (self._extract_youtube_playlist_id(url) or self._extract_youtube_channel(url)):
+            return self._fetch_youtube_playlist(url, platform)
+
         if not video_id:
             return FetchedContent(
                 url=url,
@@ -100,59 +1144,194 @@ class ContentFetcher:
 
         result = FetchedContent(url=url, platform=platform, metadata={"video_id": video_id})
 
-        # Try to get video title via oEmbed (no API key needed)
-        try:
-            oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            resp = self.session.get(oembed_url, timeout=10)
-            if resp.ok:
-                data = resp.json()
-                result.title = data.get("title")
-                result.author = data.get("author_name")
-        except Exception:
-            pass
+        # Title lookup runs alongside the transcript request
+        oembed = self._subrequests.submit(contextvars.copy_context().run, self._fetch_youtube_oembed, video_id)
 
         # Try to get transcript
         try:
-            api = YouTubeTranscriptApi()
-            transcript_result = api.fetch(video_id)
-            # Format transcript with timestamps
-            lines = []
-            for snippet in transcript_result:
-                start = int(snippet.start)
-                mins, secs = divmod(start, 60)
-                hours, mins = divmod(mins, 60)
-                if hours:
-                    timestamp = f"[{hours}:{mins:02d}:{secs:02d}]"
-                else:
-                    timestamp = f"[{mins}:{secs:02d}]"
-                lines.append(f"{timestamp} {snippet.text}")
-
-            result.transcript = "\n".join(lines)
-            result.content = f"YouTube video with {len(transcript_result)} transcript segments"
+            check_deadline()
+            self.breaker.before_request(YOUTUBE_HOST)
+            self.limiter.acquire(YOUTUBE_HOST)
+            transcript_result = self._youtube_api().fetch(video_id)
+            self.breaker.record_success(YOUTUBE_HOST)
+            # Keep timed segments; text is formatted only when requested
+            result.segments = TranscriptSegments.from_snippets(transcript_result)
+            result.content = (
+                f"YouTube video with {len(result.segments)} transcript segments "
+                f"({format_timestamp(result.segments.duration)} long)"
+            )
 
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            result.error = f"Could not fetch transcript: {str(e)}"
         except TranscriptsDisabled:
+            self.breaker.record_success(YOUTUBE_HOST)
             result.error = "Transcripts are disabled for this video"
         except NoTranscriptFound:
+            self.breaker.record_success(YOUTUBE_HOST)
             result.error = "No transcript available for this video"
+        except (requests.RequestException, RequestBlocked, IpBlocked, YouTubeRequestFailed) as e:
+            # Only transport failures and blocking say the host is unhealthy
+            self.breaker.record_failure(YOUTUBE_HOST)
+            result.error = f"Could not fetch transcript: {str(e)}"
         except Exception as e:
+            # Per-video problems (unavailable, private, age-restricted, ...) mean
+            # YouTube answered; they must not open the circuit for other videos
+            self.breaker.record_success(YOUTUBE_HOST)
+            if isinstance(e, CouldNotRetrieveTranscript):
+                logger.info(f"No transcript for {video_id}: {type(e).__name__}")
+            else:
+                logger.warning(f"Unexpected transcript error for {video_id}: {e}")
             result.error = f"Could not fetch transcript: {str(e)}"
 
+        result.title, result.author = oembed.result()
         return result
 
-    def _fetch_reddit(self, url: str, platform: str) -> FetchedContent:
-        """Fetch Reddit post content."""
+    def _fetch_youtube_oembed(self, video_id: str) -> tuple[Optional[str], Optional[str]]:
+        """Get video title and channel via oEmbed (no API key needed)."""
+        try:
+            oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
+            resp = self._get(oembed_url, circuit=YOUTUBE_OEMBED_CIRCUIT)
+            if resp.ok:
+                data = resp.json()
+                return data.get("title"), data.get("author_name")
+        except Exception:
+            pass
+        return None, None
+
+    def expand_youtube_playlist(
+        self, url: str, limit: int = PLAYLIST_MAX_VIDEOS
+    ) -> tuple[Optional[str], list[str]]:
+        """Expand a playlist or channel URL to its title and video IDs.
+
+        Channels are resolved to their uploads playlist. Only the first page
+        of the playlist (about 100 videos) is read.
+        """
+        playlist_id = self._extract_youtube_playlist_id(url)
+
+        if not playlist_id:
+            channel = self._extract_youtube_channel(url)
+            if not channel:
+                return None, []
+            if channel.startswith("channel/"):
+                channel_id = channel.split("/", 1)[1]
+            else:
+                resp = self._get(f"https://www.youtube.com/{channel}")
+                resp.raise_for_status()
+                match = YOUTUBE_CHANNEL_ID_RE.search(resp.text)
+                if not match:
+                    return None, []
+                channel_id = match.group(1)
+            # Every channel's uploads playlist is its ID with UC -> UU
+            playlist_id = "UU" + channel_id[2:]
+
+        resp = self._get(f"https://www.youtube.com/playlist?list={playlist_id}")
+        resp.raise_for_status()
+        html = resp.text
+
+        title = None
+        title_match = re.search(r'<meta property="og:title" content="([^"]*)"', html)
+        if title_match:
+            title = title_match.group(1)
+
+        video_ids = YOUTUBE_PLAYLIST_VIDEO_RE.findall(html) or YOUTUBE_ANY_VIDEO_RE.findall(html)
+        # Preserve playlist order while dropping repeats
+        return title, list(dict.fromkeys(video_ids))[:limit]
+
+    def iter_youtube_videos(
+        self,
+        video_ids: list[str],
+        concurrency: int = PLAYLIST_CONCURRENCY,
+    ) -> Iterator[FetchedContent]:
+        """Fetch videos in parallel, yielding each result as soon as it finishes.
+
+        Request rate is bounded by the YouTube host limit in HOST_RATE_LIMITS.
+        """
+        pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch-batch")
+        try:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self.fetch, f"https://www.youtube.com/watch?v={video_id}")
+                for video_id in video_ids
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Stop queued work if the caller stops iterating early
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def playlist_video_ids(self, url: str) -> list[str]:
+        """Video IDs of a playlist or channel, in playlist order.
+
+        Reuses a cached playlist fetch; otherwise only the playlist page is
+        read, so callers paging through videos don't wait for every
+        transcript. Raises ValueError for other URLs.
+        """
+        canonical = self.canonicalize(url)
+        if not canonical.key.startswith(("youtube:playlist:", "youtube:channel:")):
+            raise ValueError("Not a YouTube playlist or channel URL")
+        cached = self.peek(canonical.url)
+        if cached is not None and "video_ids" in (cached.metadata or {}):
+            return cached.metadata["video_ids"]
+        return self.expand_youtube_playlist(canonical.url)[1]
+
+    def _fetch_youtube_playlist(self, url: str, platform: str) -> FetchedContent:
+        """Fetch transcripts for every video in a playlist or channel."""
         result = FetchedContent(url=url, platform=platform)
 
         try:
-            # Reddit JSON API - append .json to URL
-            json_url = url.rstrip("/") + ".json"
-            resp = self.session.get(json_url, timeout=10)
+            title, video_ids = self.expand_youtube_playlist(url)
+        except Exception as e:
+            result.error = f"Could not read playlist: {str(e)}"
+            return result
 
-            if not resp.ok:
-                result.error = f"Reddit returned status {resp.status_code}"
-                return result
+        if not video_ids:
+            result.error = "Could not find any videos in this playlist or channel"
+            return result
+
+        result.title = title
+        by_id = {}
+        for video in self.iter_youtube_videos(video_ids):
+            by_id[video.metadata["video_id"]] = video
 
-            data = resp.json()
+        videos = [by_id[video_id] for video_id in video_ids]
+        with_transcript = [v for v in videos if v.has_transcript()]
+
+        result.content = f"YouTube playlist with {len(videos)} videos ({len(with_transcript)} with transcripts):\n" + "\n".join(
+            f"{i}. {v.title or v.metadata['video_id']} ({v.url})" + (f" [{v.error}]" if v.error else "")
+            for i, v in enumerate(videos, 1)
+        )
+        result.transcript = "\n\n".join(
+            f"## {v.title or v.metadata['video_id']} ({v.url})\n{v.transcript_text()}"
+            for v in with_transcript
+        ) or None
+        result.metadata = {
+            "video_ids": video_ids,
+            "transcripts": len(with_transcript),
+        }
+        if not with_transcript:
+            result.error = "No transcripts available for any video in this playlist"
+
+        return result
+
+    def _youtube_api(self) -> "YouTubeTranscriptApi":
+        """Return this thread's transcript client, reusing its pooled session."""
+        api = getattr(self._youtube_local, "api", None)
+        if api is None:
+            from youtube_transcript_api import YouTubeTranscriptApi
+
+            api = YouTubeTranscriptApi(http_client=build_session())
+            self._youtube_local.api = api
+        return api
+
+    def _fetch_reddit(self, url: str, platform: str) -> FetchedContent:
+        """Fetch Reddit post content with a depth- and count-limited comment tree."""
+        result = FetchedContent(url=url, platform=platform)
+
+        try:
+            # Reddit JSON API - append .json to URL; limit comments server-side
+            data = self._get_reddit_json(url.rstrip("/") + ".json")
+            if isinstance(data, FetchedContent):
+                data.url, data.platform = url, platform
+                return data
 
             # Post data is in first element
             if data and len(data) > 0:
@@ -167,26 +1346,152 @@ class ContentFetcher:
                     "created_utc": post.get("created_utc"),
                 }
 
-                # Get top comments if available
                 if len(data) > 1:
-                    comments = data[1]["data"]["children"]
-                    top_comments = []
-                    for c in comments[:5]:  # Top 5 comments
-                        if c["kind"] == "t1":
-                            comment_data = c["data"]
-                            top_comments.append({
-                                "author": comment_data.get("author"),
-                                "body": comment_data.get("body", "")[:500],
-                                "score": comment_data.get("score"),
-                            })
-                    if top_comments:
-                        result.metadata["top_comments"] = top_comments
+                    comments, more_ids = self._parse_reddit_comments(data[1]["data"]["children"])
+                    if comments:
+                        result.metadata["comments"] = comments
+                    if more_ids:
+                        result.metadata["more_ids"] = more_ids
 
         except Exception as e:
             result.error = f"Could not fetch Reddit post: {str(e)}"
 
         return result
 
+    def fetch_reddit_comments(
+        self,
+        url: str,
+        comment_id: Optional[str] = None,
+        page: int = 2,
+    ) -> FetchedContent:
+        """Load more of a Reddit thread on demand.
+
+        With comment_id (e.g. "abc123" or "t1_abc123"), fetch the reply tree
+        under that comment. Otherwise fetch `page` (2, 3, ...) of the
+        top-level comments that the initial fetch listed as "more" but did
+        not load.
+        """
+        canonical = self.canonicalize(url)
+        result = FetchedContent(url=canonical.url, platform=canonical.platform)
+        if canonical.platform != "reddit" or not canonical.key.startswith("reddit:"):
+            result.error = "Not a Reddit post URL"
+            return result
+
+        if comment_id:
+            comment_id = str(comment_id).strip().lower().removeprefix("t1_")
+            if not REDDIT_COMMENT_ID_RE.match(comment_id):
+                result.error = f"Invalid Reddit comment ID: {comment_id!r}"
+                return result
+        elif not isinstance(page, int) or isinstance(page, bool) or page < 2:
+            result.error = f"Invalid comments page {page!r}: page 1 is the initial fetch, so use 2 or more"
+            return result
+
+        post = self.fetch(canonical.url)
+        result.title = post.title
+        if post.error:
+            result.error = post.error
+            return result
+
+        try:
+            if comment_id:
+                data = self._get_reddit_json(f"{canonical.url}/_/{comment_id}.json")
+                if isinstance(data, FetchedContent):
+                    result.error = data.error
+                    return result
+                comments, more_ids = self._parse_reddit_comments(data[1]["data"]["children"])
+                result.metadata = {"comment_id": comment_id, "comments": comments}
+                return result
+
+            more_ids = (post.metadata or {}).get("more_ids", [])
+            batch = more_ids[(page - 2) * REDDIT_MORE_BATCH:(page - 1) * REDDIT_MORE_BATCH]
+            if not batch:
+                result.error = "No more comments to load"
+                return result
+
+            post_id = canonical.key.split(":", 1)[1]
+            data = self._get_reddit_json(
+                f"https://www.reddit.com/api/morechildren.json?api_type=json"
+                f"&link_id=t3_{post_id}&children={','.join(batch)}"
+            )
+            if isinstance(data, FetchedContent):
+                result.error = data.error
+                return result
+
+            things = data.get("json", {}).get("data", {}).get("things", [])
+            result.metadata = {
+                "page": page,
+                "comments": self._build_reddit_tree(things),
+                "remaining_pages": max(-(-len(more_ids) // REDDIT_MORE_BATCH) - (page - 1), 0),
+            }
+
+        except Exception as e:
+            result.error = f"Could not fetch Reddit comments: {str(e)}"
+
+        return result
+
+    def _get_reddit_json(self, json_url: str):
+        """GET a Reddit JSON endpoint, keeping only the fields we use.
+
+        Returns the decoded data, or a FetchedContent carrying the error.
+        """
+        separator = "&" if "?" in json_url else "?"
+        params = f"limit={REDDIT_COMMENT_LIMIT}&depth={REDDIT_COMMENT_DEPTH}&sort=top&raw_json=1"
+        resp = self._get(f"{json_url}{separator}{params}")
+
+        if not resp.ok:
+            return FetchedContent(url=json_url, platform="reddit", error=f"Reddit returned status {resp.status_code}")
+
+        # Trim every object as it is decoded, so the full listing (HTML
+        # renderings, awards, media metadata...) never exists as Python objects
+        return json.loads(resp.content, object_hook=_trim_reddit_object)
+
+    def _parse_reddit_comments(self, children: list) -> tuple[list[dict], list[str]]:
+        """Turn a comment listing into a nested tree plus IDs of unloaded comments."""
+        comments = []
+        more_ids = []
+        for child in children:
+            if child.get("kind") == "t1":
+                data = child["data"]
+                comment = {
+                    "id": data.get("id"),
+                    "author": data.get("author"),
+                    "body": (data.get("body") or "")[:REDDIT_COMMENT_CHARS],
+                    "score": data.get("score"),
+                }
+                # "replies" is an empty string when there are none
+                if isinstance(data.get("replies"), dict):
+                    replies, reply_more = self._parse_reddit_comments(data["replies"]["data"]["children"])
+                    if replies:
+                        comment["replies"] = replies
+                    if reply_more:
+                        comment["more_replies"] = len(reply_more)
+                comments.append(comment)
+            elif child.get("kind") == "more":
+                more_ids.extend(child["data"].get("children", []))
+        return comments, more_ids
+
+    def _build_reddit_tree(self, things: list) -> list[dict]:
+        """Nest a flat morechildren result by parent_id."""
+        by_name = {}
+        roots = []
+        for thing in things:
+            if thing.get("kind") != "t1":
+                continue
+            data = thing["data"]
+            comment = {
+                "id": data.get("id"),
+                "author": data.get("author"),
+                "body": (data.get("body") or "")[:REDDIT_COMMENT_CHARS],
+                "score": data.get("score"),
+            }
+            by_name[f"t1_{data.get('id')}"] = comment
+            parent = by_name.get(data.get("parent_id"))
+            if parent is not None:
+                parent.setdefault("replies", []).append(comment)
+            else:
+                roots.append(comment)
+        return roots
+
     def _fetch_twitter(self, url: str, platform: str) -> FetchedContent:
         """Fetch Twitter/X content (limited without API)."""
         result = FetchedContent(url=url, platform=platform)
@@ -201,7 +1506,8 @@ class ContentFetcher:
         try:
             # Try to get oEmbed data
             oembed_url = f"https://api.instagram.com/oembed?url={url}"
-            resp = self.session.get(oembed_url, timeout=10)
+            # Without auth this endpoint mostly refuses; let the breaker learn that
+            resp = self._get(oembed_url, fail_on_client_error=True)
 
             if resp.ok:
                 data = resp.json()
@@ -234,67 +1540,192 @@ class ContentFetcher:
         result = FetchedContent(url=url, platform=platform)
 
         try:
-            resp = self.session.get(url, timeout=15)
-
-            if not resp.ok:
-                result.error = f"HTTP {resp.status_code}"
-                return result
-
-            # Basic extraction - title from <title> tag
-            html = resp.text
-            title_match = re.search(r"<title[^>]*>([^<]+)</title>", html, re.IGNORECASE)
-            if title_match:
-                result.title = title_match.group(1).strip()
+            resp = self._get(url, read_timeout=WEB_READ_TIMEOUT, stream=True)
+            try:
+                if not resp.ok:
+                    result.error = f"HTTP {resp.status_code}"
+                    return result
 
-            # Try to extract main content (very basic)
-            # Remove script and style tags
-            content = re.sub(r"<script[^>]*>.*?</script>", "", html, flags=re.DOTALL | re.IGNORECASE)
-            content = re.sub(r"<style[^>]*>.*?</style>", "", content, flags=re.DOTALL | re.IGNORECASE)
-            # Remove HTML tags
-            content = re.sub(r"<[^>]+>", " ", content)
-            # Clean up whitespace
-            content = re.sub(r"\s+", " ", content).strip()
-
-            # Truncate to reasonable length
-            result.content = content[:5000] if len(content) > 5000 else content
+                # Parse the body as it arrives and stop once we have enough text
+                if self.web_mode == "text":
+                    result.title, result.content = extract_text(self._iter_text(resp), WEB_MAX_CHARS)
+                else:
+                    page = extract_main_content(self._iter_text(resp), WEB_MAX_CHARS)
+                    result.title = page.title
+                    result.author = page.author
+                    result.content = page.text
+                    metadata = {
+                        "site_name": page.site_name,
+                        "published": page.published,
+                        "description": page.description,
+                    }
+                    result.metadata = {k: v for k, v in metadata.items() if v} or None
+            finally:
+                resp.close()
 
         except Exception as e:
             result.error = f"Could not fetch page: {str(e)}"
 
         return result
 
+    def _iter_text(self, resp: requests.Response) -> Iterator[str]:
+        """Decode a streamed response body, reading at most WEB_MAX_BYTES.
+
+        The encoding comes from the BOM, headers or <meta charset> (see
+        detect_encoding) rather than resp.text's content-based guessing.
+        """
+        chunks = resp.iter_content(chunk_size=WEB_CHUNK_BYTES)
+
+        # Buffer enough of the body to sniff a <meta charset>
+        head = b""
+        for raw in chunks:
+            head += raw
+            if len(head) >= SNIFF_BYTES:
+                break
+
+        encoding = detect_encoding(resp.headers.get("Content-Type"), head)
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        received = len(head)
+        yield decoder.decode(head)
+
+        for raw in chunks:
+            if received >= WEB_MAX_BYTES:
+                return
+            check_deadline()
+            received += len(raw)
+            yield decoder.decode(raw)
+        yield decoder.decode(b"", final=True)
+
     def extract_links(self, text: str) -> list[str]:
-        """Extract all URLs from text."""
+        """Extract all URLs from text, one canonical URL per distinct link."""
         url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        return re.findall(url_pattern, text)
+
+        links = []
+        seen = set()
+        for raw in re.findall(url_pattern, text):
+            canonical = self.canonicalize(_strip_trailing_punctuation(raw))
+            if canonical.error:
+                continue
+            if canonical.key not in seen:
+                seen.add(canonical.key)
+                links.append(canonical.url)
+
+        return links
+
+
+# Built-in platforms. Third-party fetchers can add their own with
+# PLATFORMS.register(name, fetch, hosts=...) without editing ContentFetcher.
+PLATFORMS = PlatformRegistry()
+PLATFORMS.register(
+    "youtube", ContentFetcher._fetch_youtube,
+    hosts=("youtube.com", "youtu.be", "youtube-nocookie.com"),
+    canonicalize=ContentFetcher._canonical_youtube,
+)
+PLATFORMS.register(
+    "reddit", ContentFetcher._fetch_reddit,
+    hosts=("reddit.com", "redd.it"),
+    canonicalize=ContentFetcher._canonical_reddit,
+)
+PLATFORMS.register(
+    "twitter", ContentFetcher._fetch_twitter,
+    hosts=("twitter.com", "x.com"),
+    canonicalize=ContentFetcher._canonical_twitter,
+)
+PLATFORMS.register("instagram", ContentFetcher._fetch_instagram, hosts=("instagram.com",))
+PLATFORMS.register("linkedin", ContentFetcher._fetch_linkedin, hosts=("linkedin.com",))
+
+
+def _result_summary(result: FetchedContent) -> dict:
+    """JSON-friendly summary of a fetch result for CLI output."""
+    transcript = result.transcript_text()
+    return {
+        "url": result.url,
+        "platform": result.platform,
+        "title": result.title,
+        "author": result.author,
+        "content": result.content[:500] if result.content else None,
+        "has_transcript": bool(transcript),
+        "transcript_length": len(transcript) if transcript else 0,
+        "error": result.error,
+        "metadata": result.metadata,
+    }
+
+
+async def _run_batch(
+    fetcher: ContentFetcher,
+    urls: list[str],
+    parallel: int,
+    timeout: Optional[float],
+    total_timeout: Optional[float] = None,
+):
+    """Fetch URLs concurrently, printing one JSON line per result as it completes."""
+    import sys
+
+    timings: dict[int, float] = {}
+    started = time.monotonic()
+    failed = 0
+    async for index, result in fetcher.iter_fetch(
+        urls, concurrency=parallel, timeout=timeout, timings=timings, total_timeout=total_timeout
+    ):
+        if result.error:
+            failed += 1
+        line = {"index": index, "input": urls[index], "elapsed_ms": round(timings[index] * 1000)}
+        line.update(_result_summary(result))
+        print(json.dumps(line), flush=True)
+
+    print(
+        f"Fetched {len(urls)} URLs ({failed} failed) in {time.monotonic() - started:.1f}s",
+        file=sys.stderr,
+    )
 
 
 def main():
     """CLI for testing content fetcher."""
     import argparse
+    import sys
 
     parser = argparse.ArgumentParser(description="Fetch content from URLs")
-    parser.add_argument("url", help="URL to fetch")
+    parser.add_argument("url", nargs="?", help="URL to fetch")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument(
+        "--web-mode", choices=WEB_MODES, default="main",
+        help="Web pages: main article content (default) or all visible text",
+    )
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="Fetch every URL found in FILE ('-' for stdin) and stream JSON lines",
+    )
+    parser.add_argument(
+        "--parallel", type=int, default=FETCH_CONCURRENCY,
+        help=f"Concurrent fetches in batch mode (default {FETCH_CONCURRENCY})",
+    )
+    parser.add_argument("--timeout", type=float, help="Per-URL timeout in seconds for batch mode")
+    parser.add_argument("--total-timeout", type=float, help="Timeout in seconds for the whole batch")
 
     args = parser.parse_args()
+    if bool(args.url) == bool(args.batch):
+        parser.error("give either a URL or --batch FILE")
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+
+    fetcher = ContentFetcher(web_mode=args.web_mode)
+
+    if args.batch:
+        # Accepts plain URL lists as well as notes like content/log.md
+        if args.batch == "-":
+            text = sys.stdin.read()
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                text = f.read()
+        urls = fetcher.extract_links(text)
+        asyncio.run(_run_batch(fetcher, urls, args.parallel, args.timeout, args.total_timeout))
+        return
 
-    fetcher = ContentFetcher()
     result = fetcher.fetch(args.url)
+    transcript = result.transcript_text()
 
     if args.json:
-        output = {
-            "url": result.url,
-            "platform": result.platform,
-            "title": result.title,
-            "author": result.author,
-            "content": result.content[:500] if result.content else None,
-            "has_transcript": bool(result.transcript),
-            "transcript_length": len(result.transcript) if result.transcript else 0,
-            "error": result.error,
-            "metadata": result.metadata,
-        }
-        print(json.dumps(output, indent=2))
+        print(json.dumps(_result_summary(result), indent=2))
     else:
         print(f"Platform: {result.platform}")
         print(f"Title: {result.title or 'N/A'}")
@@ -303,9 +1734,9 @@ def main():
             print(f"Error: {result.error}")
         if result.content:
             print(f"\nContent preview:\n{result.content[:500]}...")
-        if result.transcript:
-            print(f"\nTranscript ({len(result.transcript)} chars):")
-            print(result.transcript[:1000] + "..." if len(result.transcript) > 1000 else result.transcript)
+        if transcript:
+            print(f"\nTranscript ({len(transcript)} chars):")
+            print(transcript[:1000] + "..." if len(transcript) > 1000 else transcript)
 
 
 if __name__ == "__main__":
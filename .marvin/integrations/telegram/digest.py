@@ -0,0 +1,284 @@
+"""Map-reduce digestion of long fetched content.
+
+Splits long transcripts and articles into chunks, summarizes the chunks in
+parallel with Claude and merges the partial summaries into one digest.
+Chunk summaries are cached in SQLite by content hash, so repeat requests
+for the same content don't call the API again.
+
+AnalysisCache keeps whole answers about a link (e.g. "summarize this"),
+keyed by canonical URL, content hash and intent, so they can be shared
+across chats.
+"""
+
+import contextvars
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from content_fetcher import FetchedContent
+from metrics import CACHE_LOOKUPS, SQLITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+CHUNK_CHARS = 12000
+MAX_CHUNKS = 24  # long content gets bigger chunks rather than more rounds
+DIGEST_WORKERS = 6
+PROMPT_VERSION = "1"  # bump to invalidate cached summaries when prompts change
+ANALYSIS_TTL = 7 * 24 * 3600  # seconds a shared analysis is served
+
+# Messages that are nothing but a request for an overview of a link. Matched
+# against the whole message (minus the link), so "summarize this and save it"
+# or "is the recap at the end accurate?" don't count.
+SUMMARY_INTENT_RE = re.compile(
+    r"(?:(?:hey|pls|please|can you|could you)\s+)*"
+    r"(?:summar(?:y|ize|ise)|tl;?dr|digest|gist|recap|key (?:points|takeaways)"
+    r"|what'?s (?:this|it|that) about"
+    r"|give me (?:a|the) (?:summary|gist|tl;?dr|recap|key (?:points|takeaways)))"
+    r"(?:\s+(?:of\s+)?(?:this|it|that|please|pls|for me|the (?:video|article|post|thread|link)))*"
+    r"[\s?.!:]*",
+    re.IGNORECASE,
+)
+
+MAP_PROMPT = """This is part {index} of {total} of {kind} titled "{title}".
+
+Summarize the key points of this part in concise bullet points.
+Keep [timestamps] for notable moments where present.
+
+{chunk}"""
+
+REDUCE_PROMPT = """Below are summaries of consecutive parts of {kind} titled "{title}".
+
+Merge them into one complete digest: a 2-3 sentence overview, then the key
+points in order. Keep [timestamps] where present and don't drop topics from
+later parts.
+
+{summaries}"""
+
+
+class SummaryCache:
+    """SQLite-backed cache of summaries keyed by content hash."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS chunk_summaries (
+                hash TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        conn.commit()
+        conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached summary."""
+        with SQLITE_SECONDS.time(op="summary_get"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT summary FROM chunk_summaries WHERE hash = ?", (key,))
+            row = cursor.fetchone()
+            conn.close()
+        CACHE_LOOKUPS.inc(cache="summary", result="hit" if row else "miss")
+        return row[0] if row else None
+
+    def put(self, key: str, summary: str):
+        """Store a summary."""
+        with SQLITE_SECONDS.time(op="summary_put"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO chunk_summaries (hash, summary) VALUES (?, ?)",
+                (key, summary),
+            )
+            conn.commit()
+            conn.close()
+
+
+def content_hash(result: FetchedContent) -> str:
+    """Hash of the fetched text, so cached analyses go stale when the page changes."""
+    text = result.transcript_text() or result.content or ""
+    return hashlib.sha256(f"{result.title or ''}\0{text}".encode()).hexdigest()
+
+
+def classify_intent(message: str, urls: list[str]) -> Optional[str]:
+    """Return "summary" for bare links and messages that only ask for a summary, else None."""
+    rest = message
+    for url in urls:
+        rest = rest.replace(url, "")
+    rest = re.sub(r"https?://\S+", "", rest).strip()
+    if not rest or SUMMARY_INTENT_RE.fullmatch(rest):
+        return "summary"
+    return None
+
+
+class AnalysisCache:
+    """SQLite-backed cache of answers about a link, shared across chats."""
+
+    def __init__(self, db_path: Path, ttl: float = ANALYSIS_TTL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                url_key TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (url_key, content_hash, intent)
+            )
+        """)
+
+        conn.commit()
+        conn.close()
+
+    def get(self, url_key: str, content_hash: str, intent: str) -> Optional[str]:
+        """Get a fresh analysis for this content and intent."""
+        with SQLITE_SECONDS.time(op="analysis_get"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT response FROM analyses"
+                " WHERE url_key = ? AND content_hash = ? AND intent = ? AND created > ?",
+                (url_key, content_hash, intent, time.time() - self.ttl),
+            )
+            row = cursor.fetchone()
+            conn.close()
+        CACHE_LOOKUPS.inc(cache="analysis", result="hit" if row else "miss")
+        return row[0] if row else None
+
+    def put(self, url_key: str, content_hash: str, intent: str, response: str):
+        """Store an analysis."""
+        with SQLITE_SECONDS.time(op="analysis_put"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO analyses (url_key, content_hash, intent, response, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url_key, content_hash, intent, response, time.time()),
+            )
+            conn.commit()
+            conn.close()
+
+
+class ContentDigester:
+    """Summarizes long content with parallel chunk summaries and a merge step."""
+
+    def __init__(
+        self,
+        create: Callable,
+        cache: SummaryCache,
+        model: str,
+        chunk_chars: int = CHUNK_CHARS,
+        workers: int = DIGEST_WORKERS,
+    ):
+        # create(max_tokens=..., messages=...) calls Claude on `model` and returns
+        # the response, e.g. the bot's instrumented call on its "summaries" route
+        self.create = create
+        self.cache = cache
+        self.model = model
+        self.chunk_chars = chunk_chars
+        self.workers = workers
+
+    def digest(self, result: FetchedContent) -> str:
+        """Return a complete digest of a fetched transcript or article."""
+        kind = "a video transcript" if result.has_transcript() else "an article"
+        title = result.title or result.url
+        chunks = self.split(result)
+
+        if not chunks:
+            return "(Nothing to digest)"
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+            # Each chunk runs in a copy of the caller's context so its Claude span nests under it
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._summarize, MAP_PROMPT.format(
+                    index=index + 1, total=len(chunks), kind=kind, title=title, chunk=chunk,
+                ))
+                for index, chunk in enumerate(chunks)
+            ]
+            summaries = [future.result() for future in futures]
+
+        if len(summaries) == 1:
+            return summaries[0]
+
+        merged = "\n\n".join(f"## Part {i + 1}\n{summary}" for i, summary in enumerate(summaries))
+        return self._summarize(REDUCE_PROMPT.format(kind=kind, title=title, summaries=merged))
+
+    def split(self, result: FetchedContent) -> list[str]:
+        """Split content into chunks on segment or line boundaries."""
+        segments = result.segments  # may be loaded from disk, so fetch once
+        if segments:
+            size = self._chunk_size(len(segments.text))
+            chunks = []
+            first = 0
+            while True:
+                text, first = segments.format_window(max_chars=size, first=first)
+                if text:
+                    chunks.append(text)
+                if first is None:
+                    return chunks
+
+        text = result.transcript or result.content or ""
+        size = self._chunk_size(len(text))
+        chunks = []
+        current = []
+        current_len = 0
+        for line in text.splitlines():
+            # Hard-split lines that are longer than a chunk on their own
+            while len(line) > size:
+                chunks.append(line[:size])
+                line = line[size:]
+            if current and current_len + len(line) + 1 > size:
+                chunks.append("\n".join(current))
+                current, current_len = [], 0
+            current.append(line)
+            current_len += len(line) + 1
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
+
+    def _chunk_size(self, length: int) -> int:
+        """Chunk size that keeps the number of chunks bounded."""
+        return max(self.chunk_chars, -(-length // MAX_CHUNKS))
+
+    def _summarize(self, prompt: str) -> str:
+        """Summarize one prompt, serving repeats from the cache."""
+        key = hashlib.sha256(f"{PROMPT_VERSION}\0{self.model}\0{prompt}".encode()).hexdigest()
+        cached = self.cache.get(key)
+        if cached:
+            return cached
+
+        try:
+            response = self.create(
+                max_tokens=1024,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            summary = response.content[0].text
+        except Exception as e:
+            logger.error(f"Error summarizing chunk: {e}")
+            return f"(This part could not be summarized: {e})"
+
+        self.cache.put(key, summary)
+        return summary
@@ -0,0 +1,468 @@
+"""Single-pass HTML text extraction.
+
+Feeds a page through an incremental HTML parser as it downloads, skipping
+script/style/navigation content and stopping as soon as enough text has
+been collected, so memory and CPU don't scale with page size.
+
+Two modes are available: `extract_text` returns all visible text, and
+`extract_main_content` picks the article body with readability-style
+text-density scoring and reads title/author/date from OpenGraph and
+JSON-LD metadata.
+"""
+
+import codecs
+import json
+import logging
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the body inspected for a <meta charset> declaration
+SNIFF_BYTES = 4096
+
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET_RE = re.compile(
+    rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)",
+    re.IGNORECASE,
+)
+
+# Labels browsers treat as windows-1252 (a superset of latin-1)
+LATIN1_LABELS = {"iso-8859-1", "iso8859-1", "latin-1", "latin1", "us-ascii", "ascii", "l1"}
+
+# Elements whose content is never main text. <form> is not listed: WebForms
+# and many CMS pages wrap the whole body in one; only its controls are skipped.
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "footer", "aside", "button", "select", "textarea",
+}
+
+# A <header> is skipped as page chrome unless it is inside one of these,
+# where it holds the article's own headline
+CONTENT_TAGS = {"article", "main"}
+
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "td", "th", "table", "section",
+    "article", "main", "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6",
+    "dt", "dd", "figcaption",
+}
+
+
+def _valid_encoding(label: Optional[str]) -> Optional[str]:
+    if not label:
+        return None
+    label = label.strip().lower()
+    if label in LATIN1_LABELS:
+        return "windows-1252"
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(content_type: Optional[str], head: bytes) -> str:
+    """Pick a decoder for an HTML body from its first bytes, without statistical guessing.
+
+    Order follows browsers: byte order mark, then the Content-Type charset,
+    then a <meta charset> in the first SNIFF_BYTES. Otherwise use UTF-8 if
+    the sniffed bytes are valid UTF-8, else windows-1252.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    if content_type:
+        match = HEADER_CHARSET_RE.search(content_type)
+        encoding = _valid_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding
+
+    match = META_CHARSET_RE.search(head[:SNIFF_BYTES])
+    encoding = _valid_encoding(match.group(1).decode("ascii", "ignore")) if match else None
+    # A page can't declare itself UTF-16 from inside its own ASCII-compatible bytes
+    if encoding and not encoding.startswith("utf-16"):
+        return encoding
+
+    try:
+        # Final decode is not forced, so a multi-byte char cut at the end is fine
+        codecs.getincrementaldecoder("utf-8")().decode(head[:SNIFF_BYTES])
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "windows-1252"
+
+
+class SkipState:
+    """Tracks whether the parser is inside an element whose text is skipped."""
+
+    def __init__(self):
+        self.depth = 0
+        self._content_depth = 0
+        self._headers: list[bool] = []  # whether each open <header> is skipped
+
+    def start(self, tag: str):
+        if tag in SKIP_TAGS:
+            self.depth += 1
+        elif tag == "header":
+            skipped = not self._content_depth
+            self._headers.append(skipped)
+            self.depth += skipped
+        elif tag in CONTENT_TAGS:
+            self._content_depth += 1
+
+    def end(self, tag: str):
+        if tag in SKIP_TAGS:
+            if self.depth:
+                self.depth -= 1
+        elif tag == "header":
+            if self._headers and self._headers.pop() and self.depth:
+                self.depth -= 1
+        elif tag in CONTENT_TAGS and self._content_depth:
+            self._content_depth -= 1
+
+
+class TextExtractor(HTMLParser):
+    """Collects page title and visible text, one line per block element."""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title: Optional[str] = None
+        self.done = False  # set once max_chars of text has been collected
+        self._title_parts: Optional[list[str]] = None
+        self._skip = SkipState()
+        self._lines: list[str] = []
+        self._current: list[str] = []
+        self._size = 0
+
+    def handle_starttag(self, tag, attrs):
+        self._skip.start(tag)
+        if tag == "title" and self.title is None:
+            self._title_parts = []
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_endtag(self, tag):
+        self._skip.end(tag)
+        if tag == "title" and self._title_parts is not None:
+            self.title = " ".join("".join(self._title_parts).split()) or None
+            self._title_parts = None
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if self._skip.depth or self.done:
+            return
+
+        # Keep raw pieces; text can be split across feed() chunks mid-word
+        self._current.append(data)
+        self._size += len(data)
+        if self._size >= self.max_chars:
+            self.done = True
+
+    def _end_line(self):
+        if self._current:
+            line = " ".join("".join(self._current).split())
+            if line:
+                self._lines.append(line)
+            self._current = []
+
+    def text(self) -> str:
+        """Collected text, truncated to max_chars."""
+        self._end_line()
+        return "\n".join(self._lines)[:self.max_chars]
+
+
+def extract_text(chunks: Iterable[str], max_chars: int) -> tuple[Optional[str], str]:
+    """Extract (title, text) from decoded HTML chunks.
+
+    Stops consuming chunks once max_chars of text has been collected.
+    """
+    parser = TextExtractor(max_chars)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+
+    return parser.title, parser.text()
+
+
+# Elements that can hold the main content of a page
+CONTAINER_TAGS = {"body", "article", "main", "section", "div", "td"}
+
+TAG_WEIGHTS = {"article": 1.5, "main": 1.4}
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|page|post|story|text", re.IGNORECASE)
+NEGATIVE_HINTS = re.compile(
+    r"comment|sidebar|footer|menu|promo|related|share|social|sponsor|cookie|"
+    r"banner|advert|popup|newsletter|subscribe|breadcrumb",
+    re.IGNORECASE,
+)
+
+# Stop parsing once this many times max_chars of candidate text is collected
+MAIN_TEXT_LOOKAHEAD = 8
+MIN_MAIN_CHARS = 200  # below this, fall back to all visible text
+
+JSONLD_TYPES = {"Article", "NewsArticle", "BlogPosting", "Report", "WebPage", "VideoObject"}
+
+
+@dataclass
+class PageContent:
+    """Main content and metadata extracted from a web page."""
+    title: Optional[str] = None
+    text: str = ""
+    author: Optional[str] = None
+    published: Optional[str] = None
+    site_name: Optional[str] = None
+    description: Optional[str] = None
+
+
+class MainContentExtractor(HTMLParser):
+    """Scores container elements by the text they hold and keeps the best one.
+
+    Each line of text is credited to its nearest container (and half to the
+    container above it), weighted by tag and class/id hints, with link-heavy
+    lines ignored. Only the nearest container is stored per line, so memory
+    stays proportional to the text collected.
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self.meta: dict[str, str] = {}
+        self.jsonld: list = []
+        self._title_parts: Optional[list[str]] = None
+        self._title: Optional[str] = None
+        self._jsonld_parts: Optional[list[str]] = None
+        self._skip = SkipState()
+        self._link_depth = 0
+        # container id -> (parent id, weight); id 0 is the document root
+        self._containers: dict[int, tuple[int, float]] = {0: (-1, 1.0)}
+        self._stack: list[tuple[str, int]] = [("", 0)]
+        # (text, link chars, container id)
+        self._lines: list[tuple[str, int, int]] = []
+        self._current: list[str] = []
+        self._current_links = 0
+        self._current_container = 0
+        self._size = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            self._handle_meta(attrs)
+            return
+
+        self._skip.start(tag)
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._jsonld_parts = []
+        elif tag == "title" and self._title is None:
+            self._title_parts = []
+        elif tag == "a":
+            self._link_depth += 1
+
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+        if tag in CONTAINER_TAGS and not self._skip.depth:
+            hints = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+            weight = TAG_WEIGHTS.get(tag, 1.0)
+            if NEGATIVE_HINTS.search(hints):
+                weight *= 0.2
+            elif POSITIVE_HINTS.search(hints):
+                weight *= 1.25
+            container_id = len(self._containers)
+            self._containers[container_id] = (self._stack[-1][1], weight)
+            self._stack.append((tag, container_id))
+
+    def handle_endtag(self, tag):
+        self._skip.end(tag)
+        if tag == "script" and self._jsonld_parts is not None:
+            self._parse_jsonld("".join(self._jsonld_parts))
+            self._jsonld_parts = None
+        elif tag == "title" and self._title_parts is not None:
+            self._title = " ".join("".join(self._title_parts).split()) or None
+            self._title_parts = None
+        elif tag == "a" and self._link_depth:
+            self._link_depth -= 1
+
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+        if tag in CONTAINER_TAGS:
+            # Tolerate unclosed children by popping back to the matching tag
+            for i in range(len(self._stack) - 1, 0, -1):
+                if self._stack[i][0] == tag:
+                    self._end_line()
+                    del self._stack[i:]
+                    break
+
+    def handle_data(self, data):
+        if self._jsonld_parts is not None:
+            self._jsonld_parts.append(data)
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if self._skip.depth or self.done:
+            return
+
+        if not self._current:
+            self._current_container = self._stack[-1][1]
+        # Keep raw pieces; text can be split across feed() chunks mid-word
+        self._current.append(data)
+        if self._link_depth:
+            self._current_links += len(data.strip())
+        self._size += len(data)
+        if self._size >= self.max_chars * MAIN_TEXT_LOOKAHEAD:
+            self.done = True
+
+    def _handle_meta(self, attrs: dict):
+        name = (attrs.get("property") or attrs.get("name") or attrs.get("itemprop") or "").lower()
+        content = attrs.get("content")
+        if name and content and name not in self.meta:
+            self.meta[name] = " ".join(content.split())
+
+    def _parse_jsonld(self, raw: str):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return
+        items = data if isinstance(data, list) else [data]
+        for item in items:
+            if isinstance(item, dict) and "@graph" in item:
+                graph = item["@graph"]
+                items.extend(graph if isinstance(graph, list) else [graph])
+            elif isinstance(item, dict):
+                self.jsonld.append(item)
+
+    def _end_line(self):
+        if self._current:
+            line = " ".join("".join(self._current).split())
+            if line:
+                self._lines.append((line, self._current_links, self._current_container))
+            self._current = []
+            self._current_links = 0
+
+    def _best_container(self) -> Optional[int]:
+        scores: dict[int, float] = {}
+        for text, link_chars, container_id in self._lines:
+            if len(text) < 25 or link_chars > len(text) / 2:
+                continue
+            score = 1 + text.count(",") + min(len(text) // 100, 3)
+            scores[container_id] = scores.get(container_id, 0) + score
+            parent_id = self._containers[container_id][0]
+            if parent_id >= 0:
+                scores[parent_id] = scores.get(parent_id, 0) + score / 2
+
+        if not scores:
+            return None
+        return max(scores, key=lambda cid: scores[cid] * self._containers[cid][1])
+
+    def _is_within(self, container_id: int, ancestor_id: int) -> bool:
+        while container_id >= 0:
+            if container_id == ancestor_id:
+                return True
+            container_id = self._containers[container_id][0]
+        return False
+
+    def main_text(self) -> str:
+        """Text of the best-scoring container, without link-heavy lines."""
+        self._end_line()
+        best = self._best_container()
+        if best is None:
+            return ""
+        lines = [
+            text for text, link_chars, container_id in self._lines
+            if link_chars <= len(text) / 2 and self._is_within(container_id, best)
+        ]
+        return "\n".join(lines)[:self.max_chars]
+
+    def all_text(self) -> str:
+        """All visible text."""
+        self._end_line()
+        return "\n".join(text for text, _, _ in self._lines)[:self.max_chars]
+
+    def page_content(self) -> PageContent:
+        """Main text plus metadata, falling back to all text for sparse pages."""
+        text = self.main_text()
+        if len(text) < MIN_MAIN_CHARS:
+            text = self.all_text()
+
+        article = self._jsonld_article()
+        meta = self.meta
+
+        # JSON-LD is free-form, so a malformed block must never cost us the page
+        try:
+            title = _as_text(article.get("headline"))
+            author = _jsonld_author(article.get("author"))
+            published = _as_text(article.get("datePublished"))
+        except Exception as e:
+            logger.debug(f"Ignoring malformed JSON-LD article: {e}")
+            title = author = published = None
+
+        return PageContent(
+            title=meta.get("og:title") or title or meta.get("twitter:title") or self._title,
+            text=text,
+            author=author or meta.get("author") or meta.get("article:author"),
+            published=(
+                published or meta.get("article:published_time") or meta.get("datepublished")
+            ),
+            site_name=meta.get("og:site_name"),
+            description=meta.get("og:description") or meta.get("description"),
+        )
+
+    def _jsonld_article(self) -> dict:
+        """The first JSON-LD item of an article type, or {}."""
+        for item in self.jsonld:
+            try:
+                if _jsonld_type(item) & JSONLD_TYPES:
+                    return item
+            except Exception as e:
+                logger.debug(f"Skipping malformed JSON-LD item: {e}")
+        return {}
+
+
+def _jsonld_type(item: dict) -> set:
+    """The string @type values of a JSON-LD item; objects in @type are ignored."""
+    kind = item.get("@type")
+    return {k for k in (kind if isinstance(kind, list) else [kind]) if isinstance(k, str)}
+
+
+def _as_text(value) -> Optional[str]:
+    return value if isinstance(value, str) and value else None
+
+
+def _jsonld_author(value) -> Optional[str]:
+    """Author name(s) from a JSON-LD author field."""
+    if isinstance(value, list):
+        names = [_jsonld_author(v) for v in value]
+        return ", ".join(n for n in names if n) or None
+    if isinstance(value, dict):
+        return _as_text(value.get("name"))
+    return _as_text(value)
+
+
+def extract_main_content(chunks: Iterable[str], max_chars: int) -> PageContent:
+    """Extract the main article text and metadata from decoded HTML chunks."""
+    parser = MainContentExtractor(max_chars)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+
+    return parser.page_content()
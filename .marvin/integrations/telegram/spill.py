@@ -0,0 +1,105 @@
+"""Content-addressed on-disk store for large fetched payloads.
+
+Big transcripts, pages and comment trees are written here once (keyed by
+the SHA-256 of their serialized form) and read back on access, so cached
+results only keep a small reference in memory. Identical payloads share a
+file, and files not touched for SPILL_MAX_AGE are pruned.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SPILL_THRESHOLD = 64 * 1024  # serialized bytes; smaller values stay in memory
+SPILL_MAX_AGE = 24 * 3600  # seconds since a file was last written or reused
+PRUNE_EVERY = 100  # puts between prune passes
+
+
+class SpilledValue:
+    """Reference to a value held in a SpillStore."""
+
+    __slots__ = ("store", "digest", "size")
+
+    def __init__(self, store: "SpillStore", digest: str, size: int):
+        self.store = store
+        self.digest = digest
+        self.size = size
+
+    def load(self) -> Any:
+        return self.store.get(self.digest)
+
+    def __repr__(self) -> str:
+        return f"<spilled {self.digest[:12]} {self.size} bytes>"
+
+
+class SpillStore:
+    """Directory of pickled values named by content hash."""
+
+    def __init__(self, root: Path, threshold: int = SPILL_THRESHOLD, max_age: float = SPILL_MAX_AGE):
+        self.root = Path(root)
+        self.threshold = threshold
+        self.max_age = max_age
+        self._puts = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.prune()
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def maybe_spill(self, value: Any) -> Any:
+        """Return a SpilledValue for large values, or the value itself."""
+        if value is None or isinstance(value, SpilledValue):
+            return value
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) < self.threshold:
+            return value
+        return SpilledValue(self, self.put(data), len(data))
+
+    def put(self, data: bytes) -> str:
+        """Store serialized bytes and return their digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            # Same content already on disk; just keep it from being pruned
+            os.utime(path)
+        else:
+            path.parent.mkdir(exist_ok=True)
+            # Write to a temp file and rename so readers never see partial files
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+        with self._lock:
+            self._puts += 1
+            due = self._puts % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+        return digest
+
+    def get(self, digest: str) -> Any:
+        """Load a stored value. Raises FileNotFoundError if it was pruned."""
+        return pickle.loads(self._path(digest).read_bytes())
+
+    def prune(self):
+        """Delete files not written or reused within max_age."""
+        cutoff = time.time() - self.max_age
+        removed = 0
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        if removed:
+            logger.info(f"Pruned {removed} spilled payloads from {self.root}")
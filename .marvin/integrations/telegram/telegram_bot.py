@@ -7,15 +7,25 @@ A Telegram interface for MARVIN that can:
 - Execute tasks on your behalf
 """
 
+from __future__ import annotations
+
+import asyncio
 import base64
+import functools
 import json
 import logging
 import os
+import random
 import re
 import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from dotenv import load_dotenv
 
@@ -27,19 +37,28 @@ MARVIN_ROOT = SCRIPT_DIR.parent.parent.parent  # .marvin/integrations/telegram -
 load_dotenv(SCRIPT_DIR / ".env")
 load_dotenv(MARVIN_ROOT / ".env")
 
-from telegram import Update
-from telegram.ext import (
-    Application,
-    CommandHandler,
-    ContextTypes,
-    MessageHandler,
-    filters,
-)
 import io
 
-import anthropic
+import metrics
+import tracing
+from metrics import CLAUDE_SECONDS, CLAUDE_TOKENS, QUEUE_DEPTH, SQLITE_SECONDS, TELEGRAM_SECONDS, TOOL_SECONDS
+from tracing import span
+from digest import AnalysisCache, ContentDigester, SummaryCache, classify_intent, content_hash
+from content_fetcher import (
+    ContentFetcher,
+    FetchedContent,
+    TranscriptSegments,
+    format_comment_tree,
+    format_timestamp,
+    parse_timestamp,
+)
 
-from content_fetcher import ContentFetcher, FetchedContent
+# telegram and anthropic are slow to import; they are loaded by run() and
+# on first use so restarts and tools that import this module start quickly
+if TYPE_CHECKING:
+    import anthropic
+    from telegram import Update
+    from telegram.ext import ContextTypes
 
 # Configure logging
 logging.basicConfig(
@@ -50,8 +69,35 @@ logger = logging.getLogger(__name__)
 
 # Paths
 DB_PATH = SCRIPT_DIR / "telegram.db"
+SPILL_DIR = SCRIPT_DIR / "cache" / "payloads"  # large fetched transcripts/pages
+TRACE_PATH = SCRIPT_DIR / "traces" / "traces.jsonl"  # per-update spans, see analyze_traces.py
 CLAUDE_MD_PATH = MARVIN_ROOT / "CLAUDE.md"
 
+# Model routing: quick turns and digest chunk summaries go to the fast model,
+# tool work to the large one
+LARGE_MODEL = os.environ.get("TELEGRAM_MODEL", "claude-sonnet-4-20250514")
+FAST_MODEL = os.environ.get("TELEGRAM_FAST_MODEL", "claude-haiku-4-5-20251001")
+FAST_MAX_CHARS = 280  # messages up to this long with no links count as quick turns
+LATENCY_WINDOW = 200  # recent calls per route kept for /status percentiles
+
+# Claude API retries (the SDK's own retries are turned off in favour of these)
+CLAUDE_MAX_ATTEMPTS = 4
+CLAUDE_BACKOFF_BASE = 1.0  # seconds, doubled per attempt with full jitter
+CLAUDE_BACKOFF_MAX = 20.0
+CLAUDE_RETRY_AFTER_MAX = 60.0  # give up rather than wait longer than this
+CLAUDE_RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504, 529)
+# Send a duplicate request if the first hasn't answered after this many seconds (0 = off)
+CLAUDE_HEDGE_AFTER = float(os.environ.get("TELEGRAM_HEDGE_AFTER", "0"))
+
+# Tool results Claude has already seen are cut down to this much once they
+# are older than the latest round, so later rounds don't resend them in full
+COMPACT_MIN_CHARS = 1500
+COMPACT_HEAD_CHARS = 400
+
+# A turn that ran any of these changed something for its chat, so its answer
+# is never shared through the analysis cache
+SIDE_EFFECT_TOOLS = {"write_file", "append_to_file", "send_file"}
+
 # Tool definitions for Claude
 TOOLS = [
     {
@@ -140,13 +186,43 @@ TOOLS = [
     },
     {
         "name": "fetch_url",
-        "description": "Fetch and extract content from a URL (YouTube transcripts, Reddit posts, articles, etc.)",
+        "description": "Fetch and extract content from a URL (YouTube transcripts, whole YouTube playlists or channels, Reddit posts, articles, etc.)",
         "input_schema": {
             "type": "object",
             "properties": {
                 "url": {
                     "type": "string",
                     "description": "The URL to fetch content from"
+                },
+                "start": {
+                    "type": "string",
+                    "description": "Optional transcript start time (e.g., '12:30' or '1:05:00') to read part of a long video"
+                },
+                "end": {
+                    "type": "string",
+                    "description": "Optional transcript end time (e.g., '20:00')"
+                },
+                "search": {
+                    "type": "string",
+                    "description": "Optional text to search for within the transcript; returns matching segments with timestamps"
+                },
+                "video": {
+                    "type": "integer",
+                    "description": "For YouTube playlists and channels: read video N (1, 2, ...) of the listing; start, end, search and mode then apply to that video"
+                },
+                "comment_id": {
+                    "type": "string",
+                    "description": "For Reddit posts: expand the reply thread under this comment ID"
+                },
+                "comments_page": {
+                    "type": "integer",
+                    "description": "For Reddit posts: load page 2, 3, ... of top-level comments that were not included in the first fetch"
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["raw", "digest"],
+                    "description": "'raw' returns the text (truncated if long). 'digest' returns a complete summary of the whole transcript or article; use it for long videos and articles",
+                    "default": "raw"
                 }
             },
             "required": ["url"]
@@ -174,6 +250,121 @@ TOOLS = [
 ]
 
 
+def wants_playlist_video(tool_input: dict) -> bool:
+    """Whether a fetch_url call asks for one video of a playlist rather than the whole playlist."""
+    return tool_input.get("video") is not None
+
+
+def wants_reddit_comments(tool_input: dict) -> bool:
+    """Whether a fetch_url call asks for more of a Reddit thread rather than the page itself."""
+    return bool(tool_input.get("comment_id")) or tool_input.get("comments_page") is not None
+
+
+def claude_retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying a failed Claude call, or None if it shouldn't be retried."""
+    import anthropic
+
+    if isinstance(error, anthropic.APIStatusError):
+        if error.status_code not in CLAUDE_RETRY_STATUSES:
+            return None
+        headers = error.response.headers
+        retry_after = None
+        try:
+            if headers.get("retry-after-ms"):
+                retry_after = float(headers["retry-after-ms"]) / 1000
+            elif headers.get("retry-after"):
+                value = headers["retry-after"]
+                try:
+                    retry_after = float(value)
+                except ValueError:
+                    retry_after = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            retry_after = None
+        if retry_after is not None:
+            return max(0.0, retry_after) if retry_after <= CLAUDE_RETRY_AFTER_MAX else None
+    elif not isinstance(error, anthropic.APIConnectionError):
+        return None
+
+    return random.uniform(0, min(CLAUDE_BACKOFF_MAX, CLAUDE_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+class locked_cached_property:
+    """Like functools.cached_property, but the value is built at most once.
+
+    functools.cached_property stopped locking in Python 3.12, so the warm-up
+    thread and the first update could each build their own client. Each
+    attribute has its own lock, so a slow build (the Claude client) doesn't
+    hold up cheap ones (the stores) needed on the event loop. Assigning the
+    attribute replaces the value, e.g. with a stub client.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+        self.lock = threading.Lock()
+        self.__doc__ = build.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        with self.lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.build(instance)
+            return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+def tracked(kind: str, **attrs):
+    """Trace a Telegram handler as a root span and count it as in progress while it runs.
+
+    Extra keyword arguments become span attributes, e.g. the command name.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            QUEUE_DEPTH.inc(queue="updates")
+            try:
+                with span("update", kind=kind, **attrs):
+                    return await handler(*args, **kwargs)
+            finally:
+                QUEUE_DEPTH.dec(queue="updates")
+        return wrapper
+    return decorator
+
+
+class LatencyStats:
+    """Rolling latency samples for each model route."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.samples: dict[str, deque] = {}
+        self.errors: dict[str, int] = {}
+
+    def record(self, route: str, seconds: float, ok: bool = True):
+        self.samples.setdefault(route, deque(maxlen=self.window)).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self) -> dict[str, dict]:
+        """Count, p50 and p95 (seconds) of the recent calls per route."""
+        result = {}
+        for route, samples in self.samples.items():
+            ordered = sorted(samples)
+            result[route] = {
+                "count": len(ordered),
+                "errors": self.errors.get(route, 0),
+                "p50": ordered[len(ordered) // 2],
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            }
+        return result
+
+
 class ConversationStore:
     """SQLite-backed conversation history."""
 
@@ -207,31 +398,33 @@ class ConversationStore:
 
     def add_message(self, chat_id: int, role: str, content: str):
         """Add a message to history."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO messages (chat_id, role, content) VALUES (?, ?, ?)",
-            (chat_id, role, content),
-        )
-        conn.commit()
-        conn.close()
+        with SQLITE_SECONDS.time(op="history_add"), span("sqlite", op="history_add"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO messages (chat_id, role, content) VALUES (?, ?, ?)",
+                (chat_id, role, content),
+            )
+            conn.commit()
+            conn.close()
 
     def get_history(self, chat_id: int, limit: int = 20) -> list[dict]:
         """Get recent conversation history."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT role, content, timestamp
-            FROM messages
-            WHERE chat_id = ?
-            ORDER BY timestamp DESC
-            LIMIT ?
-            """,
-            (chat_id, limit),
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with SQLITE_SECONDS.time(op="history_get"), span("sqlite", op="history_get"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT role, content, timestamp
+                FROM messages
+                WHERE chat_id = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+                """,
+                (chat_id, limit),
+            )
+            rows = cursor.fetchall()
+            conn.close()
 
         # Reverse to get chronological order
         messages = []
@@ -242,27 +435,81 @@ class ConversationStore:
 
     def clear_history(self, chat_id: int):
         """Clear history for a chat."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
-        conn.commit()
-        conn.close()
+        with SQLITE_SECONDS.time(op="history_clear"), span("sqlite", op="history_clear"):
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+            conn.commit()
+            conn.close()
 
 
 class MARVINBot:
     """MARVIN Telegram Bot with tool use."""
 
-    def __init__(self, token: str, allowed_user_ids: list[int] = None):
+    def __init__(
+        self,
+        token: str,
+        allowed_user_ids: list[int] = None,
+        analysis_cache: bool = False,
+        metrics_port: Optional[int] = None,
+        trace_path: Optional[Path] = TRACE_PATH,
+    ):
         self.token = token
+        self.metrics_port = metrics_port  # local Prometheus endpoint, off when None
+        self.trace_path = trace_path  # span JSONL file, off when None
         self.allowed_user_ids = allowed_user_ids or []
-        self.store = ConversationStore(DB_PATH)
-        self.fetcher = ContentFetcher()
-        self.claude = anthropic.Anthropic()
+        self.analysis_cache = analysis_cache
+        self.models = {"fast": FAST_MODEL, "large": LARGE_MODEL, "summaries": FAST_MODEL}
+        self.latency = LatencyStats()
         self._pending_files = []  # Files to send after response
 
         # Load MARVIN context
         self.system_prompt = self._build_system_prompt()
 
+    # Clients and stores are built on first use (or by _warm_up while polling
+    # starts), so the bot connects to Telegram without waiting on them
+
+    @locked_cached_property
+    def store(self) -> ConversationStore:
+        return ConversationStore(DB_PATH)
+
+    @locked_cached_property
+    def analyses(self) -> Optional[AnalysisCache]:
+        # Opt-in: answers about a link are shared across chats
+        return AnalysisCache(DB_PATH) if self.analysis_cache else None
+
+    @locked_cached_property
+    def fetcher(self) -> ContentFetcher:
+        return ContentFetcher(spill_dir=SPILL_DIR)
+
+    @locked_cached_property
+    def claude(self) -> anthropic.Anthropic:
+        import anthropic
+
+        # Retries are handled by call_claude so they can honour retry-after and hedge
+        return anthropic.Anthropic(max_retries=0)
+
+    @locked_cached_property
+    def digester(self) -> ContentDigester:
+        return ContentDigester(
+            functools.partial(self.call_claude, "summaries"), SummaryCache(DB_PATH), self.models["summaries"]
+        )
+
+    @locked_cached_property
+    def _hedges(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(thread_name_prefix="claude-hedge")
+
+    def _warm_up(self):
+        """Build the deferred clients and stores so the first message doesn't pay for them."""
+        started = time.monotonic()
+        try:
+            for name in ("store", "analyses", "fetcher", "claude", "digester"):
+                getattr(self, name)
+        except Exception as e:
+            logger.error(f"Warm-up failed, will retry on first use: {e}")
+            return
+        logger.info(f"Clients ready in {time.monotonic() - started:.2f}s")
+
     def _build_system_prompt(self) -> str:
         """Build the system prompt with MARVIN context."""
         today = datetime.now().strftime("%Y-%m-%d")
@@ -329,8 +576,30 @@ Key locations in the MARVIN workspace:
                 return self._tool_list_directory(tool_input.get("path", "."))
             elif tool_name == "append_to_file":
                 return self._tool_append_to_file(tool_input["path"], tool_input["content"])
+            elif tool_name == "fetch_url" and wants_reddit_comments(tool_input):
+                page = tool_input.get("comments_page")
+                return self._tool_fetch_reddit_comments(
+                    tool_input["url"],
+                    tool_input.get("comment_id"),
+                    2 if page is None else page,
+                )
+            elif tool_name == "fetch_url" and wants_playlist_video(tool_input):
+                return self._tool_fetch_playlist_video(
+                    tool_input["url"],
+                    tool_input["video"],
+                    tool_input.get("start"),
+                    tool_input.get("end"),
+                    tool_input.get("search"),
+                    tool_input.get("mode", "raw"),
+                )
             elif tool_name == "fetch_url":
-                return self._tool_fetch_url(tool_input["url"])
+                return self._tool_fetch_url(
+                    tool_input["url"],
+                    tool_input.get("start"),
+                    tool_input.get("end"),
+                    tool_input.get("search"),
+                    tool_input.get("mode", "raw"),
+                )
             elif tool_name == "send_file":
                 return self._tool_send_file(
                     tool_input["path"],
@@ -448,10 +717,26 @@ Key locations in the MARVIN workspace:
 
         return f"Appended {len(content)} chars to {path}"
 
-    def _tool_fetch_url(self, url: str) -> str:
+    def _tool_fetch_url(
+        self,
+        url: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        search: Optional[str] = None,
+        mode: str = "raw",
+    ) -> str:
         """Fetch content from a URL."""
-        result = self.fetcher.fetch(url)
+        return self._format_fetched(self.fetcher.fetch(url), start, end, search, mode)
 
+    def _format_fetched(
+        self,
+        result: FetchedContent,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        search: Optional[str] = None,
+        mode: str = "raw",
+    ) -> str:
+        """Format fetched content as a tool result."""
         output = f"**{result.platform.upper()}**: {result.url}\n"
         if result.title:
             output += f"Title: {result.title}\n"
@@ -459,16 +744,111 @@ Key locations in the MARVIN workspace:
             output += f"Author: {result.author}\n"
         if result.error:
             output += f"Error: {result.error}\n"
-        if result.content:
-            output += f"Content: {result.content[:2000]}\n"
-        if result.transcript:
-            if len(result.transcript) > 8000:
-                output += f"Transcript (truncated):\n{result.transcript[:8000]}...\n"
+        if mode == "digest" and not search and (result.has_transcript() or result.content):
+            output += f"Digest of full content:\n{self.digester.digest(result)}\n"
+            return output
+        metadata = dict(result.metadata or {})
+        video_ids = metadata.pop("video_ids", None)  # playlists and channels
+        # Large fields may be spilled to disk, so read each one only once
+        content = result.content
+        if content:
+            # A playlist listing is at most PLAYLIST_MAX_VIDEOS lines; keep all of it
+            output += f"Content: {content if video_ids else content[:2000]}\n"
+        segments = result.segments
+        transcript = result.transcript if segments is None else None
+        if segments:
+            output += self._format_segments(segments, start, end, search)
+        elif transcript:
+            if search:
+                matches = [line for line in transcript.splitlines() if search.lower() in line.lower()]
+                output += f"Transcript lines matching '{search}':\n" + "\n".join(matches[:50]) + "\n"
+            elif video_ids:
+                output += (
+                    f"[Transcripts of {len(video_ids)} videos not shown. Call fetch_url again with "
+                    f"video=N to read video N of the listing, search to search them all, "
+                    f"or mode='digest' for a summary of the whole playlist.]\n"
+                )
+            elif len(transcript) > 8000:
+                output += f"Transcript (truncated):\n{transcript[:8000]}...\n"
             else:
-                output += f"Transcript:\n{result.transcript}\n"
-        if result.metadata:
-            output += f"Metadata: {json.dumps(result.metadata, indent=2)[:1000]}\n"
+                output += f"Transcript:\n{transcript}\n"
+        comments = metadata.pop("comments", None)
+        more_ids = metadata.pop("more_ids", None)
+        if metadata:
+            output += f"Metadata: {json.dumps(metadata, indent=2)[:1000]}\n"
+        if comments:
+            output += f"Comments:\n{format_comment_tree(comments)}\n"
+        if more_ids:
+            output += f"[{len(more_ids)} more top-level comments not loaded; use comments_page=2 to load more]\n"
+
+        return output
+
+    def _tool_fetch_playlist_video(
+        self,
+        url: str,
+        video: int,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        search: Optional[str] = None,
+        mode: str = "raw",
+    ) -> str:
+        """Fetch one video of a YouTube playlist or channel by its position in the listing."""
+        try:
+            video_ids = self.fetcher.playlist_video_ids(url)
+        except Exception as e:
+            return f"Error: could not read playlist: {str(e)}\n"
+        if not isinstance(video, int) or isinstance(video, bool) or not 1 <= video <= len(video_ids):
+            return f"Error: video must be a number from 1 to {len(video_ids)}; got {video!r}.\n"
+
+        result = self.fetcher.fetch(f"https://www.youtube.com/watch?v={video_ids[video - 1]}")
+        output = f"[Video {video} of {len(video_ids)} in playlist {url}]\n"
+        output += self._format_fetched(result, start, end, search, mode)
+        if video < len(video_ids):
+            output += f"[Call fetch_url again with video={video + 1} for the next video.]\n"
+        return output
+
+    def _tool_fetch_reddit_comments(self, url: str, comment_id: Optional[str] = None, page: int = 2) -> str:
+        """Load a Reddit reply thread or the next page of top-level comments."""
+        result = self.fetcher.fetch_reddit_comments(url, comment_id=comment_id, page=page)
+        return self._format_fetched(result)
+
+    def _format_segments(
+        self,
+        segments: TranscriptSegments,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> str:
+        """Format a timed transcript, honoring optional time range and search."""
+        total = format_timestamp(segments.duration)
 
+        if search:
+            matches = segments.search(search)
+            if not matches:
+                return f"No transcript segments match '{search}'.\n"
+            return f"Transcript segments matching '{search}':\n{matches}\n"
+
+        try:
+            start_s = parse_timestamp(start) if start else None
+            end_s = parse_timestamp(end) if end else None
+        except ValueError:
+            return (
+                "Error: start/end must be timestamps in SS, MM:SS or HH:MM:SS format "
+                f"(e.g. '90', '1:30', '1:02:30'); got start={start!r}, end={end!r}.\n"
+            )
+        text, next_index = segments.format_window(start_s, end_s, max_chars=8000)
+
+        label = "Transcript"
+        if start_s is not None or end_s is not None:
+            label += f" {format_timestamp(start_s or 0)}-{format_timestamp(end_s or segments.duration)}"
+        output = f"{label} (video length {total}):\n{text}\n"
+        if next_index is not None:
+            next_start = segments.starts[next_index]
+            output += (
+                f"[Truncated at {format_timestamp(next_start)} of {total}. "
+                f"Call fetch_url again with start='{format_timestamp(next_start)}' to continue, "
+                f"or use search to find a topic.]\n"
+            )
         return output
 
     def _tool_send_file(self, path: str, caption: str = "") -> str:
@@ -494,6 +874,12 @@ Key locations in the MARVIN workspace:
         file_size = file_path.stat().st_size
         return f"Queued file for sending: {path} ({file_size:,} bytes)"
 
+    async def _send_text(self, update: Update, text: str):
+        """Reply with text, split into Telegram-sized messages."""
+        for i in range(0, max(len(text), 1), 4000):
+            with TELEGRAM_SECONDS.time(kind="text"), span("telegram.send", kind="text", chars=len(text)):
+                await update.message.reply_text(text[i:i + 4000])
+
     async def _send_pending_files(self, update: Update):
         """Send any queued files as Telegram attachments."""
         for file_info in self._pending_files:
@@ -506,10 +892,13 @@ Key locations in the MARVIN workspace:
                 file_obj = io.BytesIO(content)
                 file_obj.name = file_path.name
 
-                await update.message.reply_document(
-                    document=file_obj,
-                    caption=caption[:1024] if caption else None,  # Telegram caption limit
-                )
+                with TELEGRAM_SECONDS.time(kind="document"), span(
+                    "telegram.send", kind="document", bytes=len(content)
+                ):
+                    await update.message.reply_document(
+                        document=file_obj,
+                        caption=caption[:1024] if caption else None,  # Telegram caption limit
+                    )
                 logger.info(f"Sent file: {file_path.name}")
             except Exception as e:
                 logger.error(f"Error sending file {file_info['path']}: {e}")
@@ -518,13 +907,221 @@ Key locations in the MARVIN workspace:
         # Clear the queue
         self._pending_files = []
 
+    async def _execute_tools(self, tool_uses: list) -> list[dict]:
+        """Execute one round of tool calls without blocking the event loop."""
+        # Resolve every fetch_url call in this round concurrently
+        fetch_uses = [
+            t for t in tool_uses
+            if t.name == "fetch_url" and t.input.get("url")
+            and not wants_reddit_comments(t.input) and not wants_playlist_video(t.input)
+        ]
+        batched = {t.id for t in fetch_uses}
+        fetched = {}
+        fetch_error = None  # a failed batch fails each fetch_url call, not the turn
+        fetch_elapsed = 0.0
+        if fetch_uses:
+            started = time.monotonic()
+            try:
+                with span("fetch_many", urls=len(fetch_uses)):
+                    results = await self.fetcher.fetch_many([t.input["url"] for t in fetch_uses])
+                fetched = {t.id: r for t, r in zip(fetch_uses, results)}
+            except Exception as e:
+                logger.error(f"Batched fetch error: {e}")
+                fetch_error = e
+            fetch_elapsed = time.monotonic() - started
+
+        tool_results = []
+        for tool_use in tool_uses:
+            logger.info(f"Executing tool: {tool_use.name}")
+            started = time.monotonic()
+            with span(
+                "tool", tool=tool_use.name, input_bytes=len(json.dumps(tool_use.input, default=str))
+            ) as tool_span:
+                if tool_use.id in batched:
+                    if fetch_error is not None:
+                        result = f"Error executing {tool_use.name}: {str(fetch_error)}"
+                    else:
+                        try:
+                            # Formatting may call Claude (digest mode), so keep it off the loop
+                            result = await asyncio.to_thread(
+                                self._format_fetched,
+                                fetched[tool_use.id],
+                                tool_use.input.get("start"),
+                                tool_use.input.get("end"),
+                                tool_use.input.get("search"),
+                                tool_use.input.get("mode", "raw"),
+                            )
+                        except Exception as e:
+                            logger.error(f"Tool execution error: {e}")
+                            result = f"Error executing {tool_use.name}: {str(e)}"
+                else:
+                    result = await asyncio.to_thread(self._execute_tool, tool_use.name, tool_use.input)
+                tool_span.set(output_chars=len(result))
+            # Batched fetches are charged to each fetch_url call they served
+            elapsed = time.monotonic() - started + (fetch_elapsed if tool_use.id in batched else 0)
+            TOOL_SECONDS.observe(elapsed, tool=tool_use.name)
+            tool_results.append({
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": result,
+            })
+
+        return tool_results
+
+    async def _call_claude(self, route: str, **kwargs):
+        """Call Claude on the model for a route without blocking the event loop (see call_claude)."""
+        return await asyncio.to_thread(self.call_claude, route, **kwargs)
+
+    def call_claude(self, route: str, **kwargs):
+        """Call Claude on the model for a route ("fast", "large" or "summaries"), blocking.
+
+        Transient failures (overload, rate limits, connection errors) are
+        retried with jittered backoff, honouring retry-after, so a tool loop
+        carries on from where it was instead of failing the whole turn. Every
+        attempt is timed per route and its token usage counted. Used directly
+        from worker threads such as the digester's.
+        """
+        model = self.models[route]
+        with span("claude", route=route, model=model, messages=len(kwargs.get("messages", []))) as claude_span:
+            for attempt in range(1, CLAUDE_MAX_ATTEMPTS + 1):
+                started = time.monotonic()
+                try:
+                    response = self._create_hedged(model=model, **kwargs)
+                except Exception as e:
+                    self.latency.record(route, time.monotonic() - started, ok=False)
+                    CLAUDE_SECONDS.observe(time.monotonic() - started, route=route, outcome="error")
+                    delay = claude_retry_delay(e, attempt)
+                    if delay is None or attempt == CLAUDE_MAX_ATTEMPTS:
+                        raise
+                    claude_span.set(retries=attempt)
+                    logger.warning(f"Claude {route} attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+
+                elapsed = time.monotonic() - started
+                self.latency.record(route, elapsed)
+                CLAUDE_SECONDS.observe(elapsed, route=route, outcome="ok")
+                usage = getattr(response, "usage", None)
+                for kind in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+                    count = getattr(usage, kind, None)
+                    if count:
+                        CLAUDE_TOKENS.inc(count, route=route, kind=kind.removesuffix("_tokens"))
+                        claude_span.set(**{kind: count})
+                logger.info(f"Claude {route} ({model}): {elapsed:.2f}s")
+                return response
+
+    def _create_hedged(self, **kwargs):
+        """messages.create, plus a duplicate request if the first is slower than CLAUDE_HEDGE_AFTER."""
+        if not CLAUDE_HEDGE_AFTER:
+            return self.claude.messages.create(**kwargs)
+
+        first = self._hedges.submit(self.claude.messages.create, **kwargs)
+        done, _ = wait({first}, timeout=CLAUDE_HEDGE_AFTER)
+        if done:
+            return first.result()
+
+        logger.info(f"Claude call slower than {CLAUDE_HEDGE_AFTER}s, sending a hedged request")
+        pending = {first, self._hedges.submit(self.claude.messages.create, **kwargs)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser keeps running in its thread; its result is dropped
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _route_for_message(self, user_message: str) -> str:
+        """Pick the route for the first call of a turn.
+
+        Short messages without links go to the fast model; see
+        _call_first_round for when that call is escalated.
+        """
+        if len(user_message) <= FAST_MAX_CHARS and not re.search(r"https?://", user_message):
+            return "fast"
+        return "large"
+
+    async def _call_first_round(self, route: str, **kwargs):
+        """Call Claude for the first round of a turn; returns (response, escalated).
+
+        A fast-route answer is kept unless it asks for tools with side
+        effects: that's multi-step work (e.g. "find X and append it to Y"),
+        so the round is asked again on the large model and the turn stays
+        there for its remaining tool rounds. A large-route call doesn't
+        escalate by itself; its tool rounds may still end on the fast model.
+        """
+        response = await self._call_claude(route, **kwargs)
+        if route != "fast" or response.stop_reason != "tool_use":
+            return response, False
+        if not any(block.name in SIDE_EFFECT_TOOLS for block in response.content if block.type == "tool_use"):
+            return response, False
+        logger.info("Fast model asked for side-effect tools; escalating turn to the large model")
+        return await self._call_claude("large", **kwargs), True
+
+    async def _call_after_tools(self, escalated: bool, tool_uses: list, **kwargs):
+        """Call Claude for the round after a tool round; returns (response, escalated).
+
+        The round after tool results usually just formats the answer, so the
+        fast model is tried first. If it asks for more tools, the turn is
+        multi-step tool work: its response is dropped, the round is asked
+        again on the large model, and the turn's later rounds stay there
+        until a round with side effects (write, append, send) has run, after
+        which the answer is normally just a confirmation.
+        """
+        if not escalated or any(tool_use.name in SIDE_EFFECT_TOOLS for tool_use in tool_uses):
+            response = await self._call_claude("fast", **kwargs)
+            if response.stop_reason != "tool_use":
+                return response, escalated
+            logger.info("Fast model asked for more tools; escalating turn to the large model")
+        return await self._call_claude("large", **kwargs), True
+
+    def _compact_tool_results(self, messages: list[dict]):
+        """Shorten large tool results from earlier rounds of the tool loop.
+
+        Call before appending a new round: every tool result already in
+        `messages` has been read by Claude at least once. Each large one is
+        cut to its first lines plus a note on how to get the rest again
+        (fetches are cached, so repeating one is cheap).
+        """
+        tool_calls = {}
+        for message in messages:
+            if message["role"] == "assistant" and isinstance(message["content"], list):
+                for block in message["content"]:
+                    if getattr(block, "type", None) == "tool_use":
+                        tool_calls[block.id] = block
+
+        for message in messages:
+            if message["role"] != "user" or not isinstance(message["content"], list):
+                continue
+            for block in message["content"]:
+                if not isinstance(block, dict) or block.get("type") != "tool_result":
+                    continue
+                content = block.get("content")
+                if not isinstance(content, str) or len(content) <= COMPACT_MIN_CHARS:
+                    continue
+                call = tool_calls.get(block["tool_use_id"])
+                how = (
+                    f"call {call.name} again with {json.dumps(call.input)}"
+                    if call else "repeat the tool call"
+                )
+                block["content"] = (
+                    f"{content[:COMPACT_HEAD_CHARS]}\n"
+                    f"[... {len(content) - COMPACT_HEAD_CHARS} more chars already shown earlier; "
+                    f"to see them again, {how}]"
+                )
+
     async def _generate_response(
         self,
         user_message: str,
         chat_history: list[dict],
         update: Update = None,
+        tools_used: Optional[set] = None,
     ) -> str:
-        """Generate a response using Claude with tool use."""
+        """Generate a response using Claude with tool use.
+
+        If `tools_used` is given, the names of the tools run are added to it.
+        """
 
         # Build messages
         messages = []
@@ -532,10 +1129,12 @@ Key locations in the MARVIN workspace:
             messages.append({"role": msg["role"], "content": msg["content"]})
         messages.append({"role": "user", "content": user_message})
 
+        actions_taken = []  # Track significant actions for summary
+
         try:
             # Initial API call
-            response = self.claude.messages.create(
-                model="claude-sonnet-4-20250514",
+            response, escalated = await self._call_first_round(
+                self._route_for_message(user_message),
                 max_tokens=4096,
                 system=self.system_prompt,
                 tools=TOOLS,
@@ -545,7 +1144,6 @@ Key locations in the MARVIN workspace:
             # Handle tool use loop with max iterations to prevent infinite loops
             max_tool_iterations = 10
             iteration = 0
-            actions_taken = []  # Track significant actions for summary
 
             while response.stop_reason == "tool_use" and iteration < max_tool_iterations:
                 iteration += 1
@@ -560,18 +1158,14 @@ Key locations in the MARVIN workspace:
 
                 # Extract tool uses from response
                 tool_uses = [block for block in response.content if block.type == "tool_use"]
+                if tools_used is not None:
+                    tools_used.update(tool_use.name for tool_use in tool_uses)
 
                 # Execute tools and collect results
-                tool_results = []
-                for tool_use in tool_uses:
-                    logger.info(f"Executing tool: {tool_use.name}")
-                    result = self._execute_tool(tool_use.name, tool_use.input)
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use.id,
-                        "content": result,
-                    })
+                with span("tool_round", iteration=iteration, tools=len(tool_uses)):
+                    tool_results = await self._execute_tools(tool_uses)
 
+                for tool_use in tool_uses:
                     # Track significant actions
                     if tool_use.name == "write_file":
                         path = tool_use.input.get("path", "file")
@@ -583,11 +1177,13 @@ Key locations in the MARVIN workspace:
                         actions_taken.append(f"📎 Sending: {path}")
 
                 # Continue conversation with tool results
+                self._compact_tool_results(messages)
                 messages.append({"role": "assistant", "content": response.content})
                 messages.append({"role": "user", "content": tool_results})
 
-                response = self.claude.messages.create(
-                    model="claude-sonnet-4-20250514",
+                response, escalated = await self._call_after_tools(
+                    escalated,
+                    tool_uses,
                     max_tokens=4096,
                     system=self.system_prompt,
                     tools=TOOLS,
@@ -617,8 +1213,15 @@ Key locations in the MARVIN workspace:
 
         except Exception as e:
             logger.error(f"Claude API error: {e}")
+            if actions_taken:
+                # Tool calls already ran; say what was done so it isn't repeated blindly
+                return (
+                    f"Sorry, I encountered an error: {str(e)}\n\n"
+                    "Before that I had done:\n" + "\n".join(actions_taken)
+                )
             return f"Sorry, I encountered an error: {str(e)}"
 
+    @tracked("command", command="start")
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command."""
         if not self._is_authorized(update.effective_user.id):
@@ -635,6 +1238,7 @@ Key locations in the MARVIN workspace:
             "Just send me messages or share links!"
         )
 
+    @tracked("command", command="help")
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command."""
         if not self._is_authorized(update.effective_user.id):
@@ -654,6 +1258,7 @@ Key locations in the MARVIN workspace:
             parse_mode="Markdown",
         )
 
+    @tracked("command", command="clear")
     async def clear_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /clear command."""
         if not self._is_authorized(update.effective_user.id):
@@ -662,6 +1267,7 @@ Key locations in the MARVIN workspace:
         self.store.clear_history(update.effective_chat.id)
         await update.message.reply_text("Conversation history cleared. 🧹")
 
+    @tracked("command", command="status")
     async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /status command."""
         if not self._is_authorized(update.effective_user.id):
@@ -673,10 +1279,66 @@ Key locations in the MARVIN workspace:
             f"• Messages in history: {len(history)}\n"
             f"• Tools available: {len(TOOLS)}\n"
             f"• User ID: {update.effective_user.id}\n"
-            f"• Workspace: {MARVIN_ROOT.name}",
+            f"• Workspace: {MARVIN_ROOT.name}"
+            + self._format_latency()
+            + self._format_metrics(),
             parse_mode="Markdown",
         )
 
+    def _format_latency(self) -> str:
+        """Per-route model latency lines for /status."""
+        lines = []
+        for route, stats in self.latency.summary().items():
+            lines.append(
+                f"\n• {route} ({self.models[route]}): {stats['count']} calls, "
+                f"p50 {stats['p50']:.1f}s, p95 {stats['p95']:.1f}s"
+                + (f", {stats['errors']} errors" if stats["errors"] else "")
+            )
+        return "".join(lines)
+
+    def _format_metrics(self) -> str:
+        """Tool, cache, token and storage summaries for /status."""
+        lines = []
+
+        tools = sorted(TOOL_SECONDS.stats().items(), key=lambda item: -item[1][1])
+        if tools:
+            lines.append("\n\n*Tools* (calls, mean):")
+            for (tool,), (count, total) in tools:
+                lines.append(f"\n• `{tool}`: {count}, {total / count:.2f}s")
+
+        caches = metrics.cache_hit_rates()
+        if caches:
+            lines.append("\n\n*Caches* (lookups, hit rate):")
+            for cache, (total, rate) in sorted(caches.items()):
+                lines.append(f"\n• `{cache}`: {total}, {rate:.0%}")
+
+        usage = []
+        tokens: dict[str, dict[str, float]] = {}
+        for (route, kind), count in CLAUDE_TOKENS.values().items():
+            tokens.setdefault(route, {})[kind] = count
+        for route, kinds in sorted(tokens.items()):
+            usage.append(
+                f"\n• {route} tokens: {int(kinds.get('input', 0)):,} in, {int(kinds.get('output', 0)):,} out"
+                + (f", {int(kinds['cache_read']):,} cached" if kinds.get("cache_read") else "")
+            )
+
+        for label, histogram in (("SQLite", SQLITE_SECONDS), ("Telegram sends", TELEGRAM_SECONDS)):
+            stats = histogram.stats().values()
+            count = sum(c for c, _ in stats)
+            if count:
+                usage.append(f"\n• {label}: {count} ops, mean {sum(t for _, t in stats) / count * 1000:.0f}ms")
+
+        depths = {queue: int(value) for (queue,), value in QUEUE_DEPTH.values().items() if value}
+        if depths:
+            # Names like fetch_inflight need backticks, or Markdown reads the underscore as italics
+            usage.append("\n• Queues: " + ", ".join(f"`{q}` {n}" for q, n in sorted(depths.items())))
+
+        if usage:
+            lines.append("\n\n*Usage:*")
+            lines.extend(usage)
+        return "".join(lines)
+
+    @tracked("command", command="save")
     async def save_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /save command - checkpoint conversation to session log."""
         if not self._is_authorized(update.effective_user.id):
@@ -715,8 +1377,8 @@ Conversation:
 {conversation_text}"""
 
         try:
-            response = self.claude.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = await self._call_claude(
+                "fast",
                 max_tokens=1024,
                 messages=[{"role": "user", "content": summary_prompt}],
             )
@@ -758,6 +1420,7 @@ Conversation:
         self.store.add_message(chat_id, "user", f"/save {topic or ''}")
         self.store.add_message(chat_id, "assistant", f"Checkpointed conversation to sessions/telegram-{today}.md")
 
+    @tracked("message")
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle regular messages."""
         if not self._is_authorized(update.effective_user.id):
@@ -770,6 +1433,11 @@ Conversation:
         # Clear any pending files from previous requests
         self._pending_files = []
 
+        # Start fetching pasted links now so they are ready (or in flight)
+        # by the time Claude asks for them with fetch_url
+        links = self.fetcher.extract_links(user_message)
+        self.fetcher.prefetch(links)
+
         # Store user message
         self.store.add_message(chat_id, "user", user_message)
 
@@ -779,23 +1447,64 @@ Conversation:
         # Get conversation history
         history = self.store.get_history(chat_id)
 
-        # Generate response (with tool use)
-        response = await self._generate_response(user_message, history, update=update)
+        analysis_key, cached = None, None
+        if self.analyses and len(links) == 1:
+            analysis_key, cached = await self._lookup_analysis(user_message, links[0])
+
+        if cached and analysis_key[2]:
+            # Same content, same kind of request: reuse the earlier answer
+            response = f"{cached}\n\n(Shared analysis from an earlier request)"
+        else:
+            model_message = user_message
+            if cached:
+                model_message += (
+                    f"\n\n[Summary of {links[0]} from an earlier request. Use it instead of "
+                    f"fetching the link if it answers the question:]\n{cached}"
+                )
+            # Generate response (with tool use)
+            tools_used = set()
+            response = await self._generate_response(model_message, history, update=update, tools_used=tools_used)
+            if (
+                analysis_key and analysis_key[2]
+                and not tools_used & SIDE_EFFECT_TOOLS
+                and not response.startswith(("Sorry, I encountered an error", "I hit my tool use limit"))
+            ):
+                self.analyses.put(*analysis_key, response)
 
         # Store assistant response
         self.store.add_message(chat_id, "assistant", response)
 
         # Send response (split if too long for Telegram)
-        if len(response) > 4000:
-            for i in range(0, len(response), 4000):
-                await update.message.reply_text(response[i:i + 4000])
-        else:
-            await update.message.reply_text(response)
+        await self._send_text(update, response)
 
         # Send any queued file attachments
         if self._pending_files:
             await self._send_pending_files(update)
 
+    async def _lookup_analysis(self, user_message: str, url: str) -> tuple[Optional[tuple], Optional[str]]:
+        """Find a shared analysis of a link.
+
+        Returns the cache key (canonical URL key, content hash, intent) and
+        the cached answer for that intent. For messages without a known
+        intent, the cached summary is returned instead as context for Claude,
+        but only if the link has already been fetched.
+        """
+        intent = classify_intent(user_message, [url])
+        if intent == "summary":
+            # The link is usually already being prefetched, so this mostly waits on that
+            result = await self.fetcher.fetch_async(url)
+        else:
+            # Extra context isn't worth holding up the first model call for
+            result = self.fetcher.peek(url)
+        if result is None or result.error:
+            return None, None
+
+        url_key = self.fetcher.canonicalize(url).key
+        digest = await asyncio.to_thread(content_hash, result)
+        cached = self.analyses.get(url_key, digest, intent or "summary")
+        return (url_key, digest, intent), cached
+
+    @tracked("photo")
     async def handle_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle photo messages - analyze images with Claude Vision."""
         if not self._is_authorized(update.effective_user.id):
@@ -857,8 +1566,8 @@ Conversation:
             })
 
             # Call Claude with vision
-            response = self.claude.messages.create(
-                model="claude-sonnet-4-20250514",
+            response, escalated = await self._call_first_round(
+                "large",
                 max_tokens=4096,
                 system=self.system_prompt,
                 tools=TOOLS,
@@ -881,28 +1590,23 @@ Conversation:
                         pass
 
                 tool_uses = [block for block in response.content if block.type == "tool_use"]
-                tool_results = []
+                with span("tool_round", iteration=iteration, tools=len(tool_uses)):
+                    tool_results = await self._execute_tools(tool_uses)
 
                 for tool_use in tool_uses:
-                    logger.info(f"Executing tool: {tool_use.name}")
-                    result = self._execute_tool(tool_use.name, tool_use.input)
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use.id,
-                        "content": result,
-                    })
-
                     # Track actions
                     if tool_use.name == "write_file":
                         actions_taken.append(f"✅ Wrote: {tool_use.input.get('path', 'file')}")
                     elif tool_use.name == "send_file":
                         actions_taken.append(f"📎 Sending: {tool_use.input.get('path', 'file')}")
 
+                self._compact_tool_results(messages)
                 messages.append({"role": "assistant", "content": response.content})
                 messages.append({"role": "user", "content": tool_results})
 
-                response = self.claude.messages.create(
-                    model="claude-sonnet-4-20250514",
+                response, escalated = await self._call_after_tools(
+                    escalated,
+                    tool_uses,
                     max_tokens=4096,
                     system=self.system_prompt,
                     tools=TOOLS,
@@ -924,11 +1628,7 @@ Conversation:
             # Store and send response
             self.store.add_message(chat_id, "assistant", final_response)
 
-            if len(final_response) > 4000:
-                for i in range(0, len(final_response), 4000):
-                    await update.message.reply_text(final_response[i:i + 4000])
-            else:
-                await update.message.reply_text(final_response)
+            await self._send_text(update, final_response)
 
             # Send any pending files
             if self._pending_files:
@@ -940,6 +1640,9 @@ Conversation:
 
     def run(self):
         """Run the bot."""
+        from telegram import Update
+        from telegram.ext import Application, CommandHandler, MessageHandler, filters
+
         app = Application.builder().token(self.token).build()
 
         # Add handlers
@@ -951,9 +1654,16 @@ Conversation:
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
         app.add_handler(MessageHandler(filters.PHOTO, self.handle_photo))
 
+        if self.metrics_port:
+            metrics.serve(self.metrics_port)
+        if self.trace_path:
+            tracing.configure(self.trace_path)
+            logger.info(f"Writing traces to {self.trace_path}")
+
         # Run
         logger.info("Starting MARVIN Telegram bot...")
         logger.info(f"Workspace: {MARVIN_ROOT}")
+        threading.Thread(target=self._warm_up, name="warm-up", daemon=True).start()
         app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
@@ -964,6 +1674,14 @@ def main():
     parser = argparse.ArgumentParser(description="MARVIN Telegram Bot")
     parser.add_argument("--token", help="Telegram bot token (or set TELEGRAM_BOT_TOKEN env)")
     parser.add_argument("--user-id", type=int, help="Allowed user ID (for security)")
+    parser.add_argument(
+        "--analysis-cache", action="store_true",
+        help="Share answers about the same link across chats (or set TELEGRAM_ANALYSIS_CACHE=1)",
+    )
+    parser.add_argument(
+        "--metrics-port", type=int,
+        help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics (or set TELEGRAM_METRICS_PORT)",
+    )
 
     args = parser.parse_args()
 
@@ -983,7 +1701,28 @@ def main():
         except ValueError:
             print("Warning: Could not parse TELEGRAM_ALLOWED_USERS")
 
-    bot = MARVINBot(token, allowed_users)
+    analysis_cache = args.analysis_cache or os.environ.get("TELEGRAM_ANALYSIS_CACHE", "").lower() in ("1", "true", "yes")
+
+    metrics_port = args.metrics_port
+    if metrics_port is None and os.environ.get("TELEGRAM_METRICS_PORT"):
+        try:
+            metrics_port = int(os.environ["TELEGRAM_METRICS_PORT"])
+        except ValueError:
+            print("Warning: Could not parse TELEGRAM_METRICS_PORT")
+
+    trace_setting = os.environ.get("TELEGRAM_TRACE_FILE", "")
+    if trace_setting.lower() in ("off", "0", "false", "no"):
+        trace_path = None
+    else:
+        trace_path = Path(trace_setting) if trace_setting else TRACE_PATH
+
+    bot = MARVINBot(
+        token,
+        allowed_users,
+        analysis_cache=analysis_cache,
+        metrics_port=metrics_port,
+        trace_path=trace_path,
+    )
     bot.run()
 
 
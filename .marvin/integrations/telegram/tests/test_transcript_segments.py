@@ -0,0 +1,59 @@
+"""Tests for TranscriptSegments windowing and digest chunking.
+
+Run from this directory's parent with: python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from content_fetcher import FetchedContent, TranscriptSegments
+from digest import ContentDigester
+
+
+def segments(*items):
+    return TranscriptSegments.from_snippets(
+        SimpleNamespace(start=start, duration=1.0, text=text) for start, text in items
+    )
+
+
+def page_all(transcript, max_chars):
+    pages, first = [], 0
+    while first is not None:
+        text, first = transcript.format_window(max_chars=max_chars, first=first)
+        pages.append(text)
+    return pages
+
+
+def test_paging_by_index_keeps_segments_sharing_a_start_time():
+    transcript = segments((0.0, "intro"), (1.0, "a" * 20), (1.0, "b" * 20), (2.0, "c"))
+    pages = page_all(transcript, max_chars=40)
+    text = "\n".join(pages)
+    for word in ("intro", "a" * 20, "b" * 20, "c"):
+        assert text.count(word) == 1
+
+
+def test_resuming_from_a_start_time_never_skips_segments():
+    transcript = segments((0.0, "intro"), (1.0, "a" * 20), (1.0, "b" * 20), (2.0, "c"))
+    _, next_index = transcript.format_window(max_chars=40)
+    text, _ = transcript.format_window(transcript.starts[next_index])
+    assert "b" * 20 in text
+
+
+def test_start_between_segments_includes_the_one_playing():
+    transcript = segments((0.0, "zero"), (10.0, "ten"), (10.0, "also ten"), (20.0, "twenty"))
+    assert transcript.format(15) == "[0:10] ten\n[0:10] also ten\n[0:20] twenty"
+    assert transcript.format(10, 20) == "[0:10] ten\n[0:10] also ten"
+    assert transcript.format(0.5) == transcript.format()
+
+
+def test_digest_split_covers_every_segment():
+    transcript = segments(*((float(i // 3), f"segment {i} " + "x" * 30) for i in range(300)))
+    digester = ContentDigester(create=None, cache=None, model="test", chunk_chars=2000)
+    chunks = digester.split(FetchedContent(url="u", platform="youtube", segments=transcript))
+    text = "\n".join(chunks)
+    assert len(chunks) > 1
+    for i in range(300):
+        assert text.count(f"segment {i} ") == 1
@@ -0,0 +1,102 @@
+"""Nested timing spans written as JSON lines for offline profiling.
+
+Each Telegram update opens a root span; Claude calls, tool rounds, tools,
+fetches, SQLite operations and Telegram sends open child spans under
+whatever span is current. The current span lives in a context variable,
+so nesting follows asyncio tasks and asyncio.to_thread calls.
+
+Finished spans are written one per line to a rotating file once
+configure() has been called; until then spans are timed but not written.
+Analyze the output with analyze_traces.py.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUPS = 5
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+# Dedicated logger so spans go only to the trace file, never to the console
+_writer = logging.getLogger("marvin.traces")
+_writer.propagate = False
+_writer.setLevel(logging.INFO)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "duration", "attrs", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: dict):
+        self.trace_id = parent.trace_id if parent else os.urandom(8).hex()
+        self.span_id = os.urandom(4).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs):
+        """Add attributes, e.g. sizes known only once the work is done."""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        record = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+def configure(path: Path, max_bytes: int = TRACE_MAX_BYTES, backups: int = TRACE_BACKUPS):
+    """Start writing finished spans to a rotating JSONL file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for handler in list(_writer.handlers):
+        _writer.removeHandler(handler)
+        handler.close()
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _writer.addHandler(handler)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span]:
+    """Time the with-block as a child of the current span (or as a new trace)."""
+    started = time.monotonic()
+    current = Span(name, _current.get(), attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.monotonic() - started
+        _current.reset(token)
+        if _writer.handlers:
+            _writer.info(json.dumps(current.to_dict(), default=str))